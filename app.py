@@ -45,22 +45,50 @@ import streamlit as st
 # Think of it like making a phone call to another service
 import requests
 
+# HTTPAdapter and Retry: Settings for how requests reuses connections
+# and automatically retries when the network hiccups
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
 # JSON: Helps us work with structured data
 # JSON is like a filing system for organizing information
 import json
 
-# Time: Lets us add delays and timestamps
-# Useful for preventing API rate limits
-import time
+# orjson: An optional, much faster JSON library (written in Rust)
+# If it's installed we use it for API requests/responses; if not,
+# we quietly fall back to Python's built-in json module above
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Hashlib: Turns any text into a short, fixed-size "fingerprint" (hash)
+# We use it to build compact keys for our answer cache
+import hashlib
+
+# Asyncio: Lets one program wait for several network calls at once
+# We use it to ask the AI several questions in parallel
+import asyncio
+
+# Threading: Lets us keep a helper running in the background
+# (our asyncio event loop lives in its own thread - see Section 5)
+import threading
 
 # OpenAI: Official client for OpenAI API (ChatGPT)
-# We use this to communicate with OpenAI's models
-from openai import OpenAI
+# NOTE: We DON'T import it here. The openai library is big (it loads
+# several other libraries) and takes over half a second to import.
+# Instead, the functions that need it import it themselves, so the app
+# starts faster - and Hugging Face users never pay that cost at all.
 
 # Import our custom files
 # These are the files we created earlier
-from obsidian_knowledge import get_all_examples_as_context, search_knowledge_base
+from obsidian_knowledge import search_knowledge_base, get_relevant_context
 from project_manager import ProjectManager
+from rate_limiter import TokenBucket
+from response_cache import ResponseCache
+from system_prompts import (
+    PROMPT_CACHE_KEYS, build_system_prompt, build_system_message, build_hf_instructions
+)
 
 
 # ============================================
@@ -107,6 +135,76 @@ DEFAULT_API_PROVIDER = "openai"
 OPENAI_MODEL_NORMAL = "gpt-3.5-turbo"      # Fast and cheap ($0.0005/1K tokens)
 OPENAI_MODEL_ADVANCED = "gpt-4o-mini"      # Better quality, still affordable
 
+# Default model for each provider and mode
+# Deep Research Mode (True) switches to the strongest model,
+# normal mode (False) uses a fast, affordable one
+# Format: provider -> {deep_research_on: model name}
+DEFAULT_MODELS = {
+    "openai": {
+        False: "gpt-3.5-turbo",                     # Fast and cheap
+        True: "gpt-4",                              # Strongest OpenAI model
+    },
+    "huggingface": {
+        False: "microsoft/DialoGPT-medium",         # Good and fast
+        True: "meta-llama/Llama-2-7b-chat-hf",      # Most advanced HF model
+    },
+}
+
+# AI providers the user can pick in the sidebar
+# Format: Internal Name -> Display Name
+PROVIDER_LABELS = {
+    "openai": "OpenAI",
+    "huggingface": "Hugging Face",
+}
+
+# Models the user can pick in the sidebar
+# Format: Display Name -> Internal Model ID
+OPENAI_MODEL_CHOICES = {
+    "GPT-3.5 Turbo (Fast & Affordable)": "gpt-3.5-turbo",
+    "GPT-4o Mini (Better Quality)": "gpt-4o-mini",
+    "GPT-4 (Most Powerful)": "gpt-4",
+}
+HF_MODEL_CHOICES = {
+    "DialoGPT Medium (Conversational)": "microsoft/DialoGPT-medium",
+    "GPT-2 (Classic)": "gpt2",
+    "Llama 2 Chat (Advanced)": "meta-llama/Llama-2-7b-chat-hf",
+}
+
+# Prepared once from the tables above, for the sidebar dropdowns:
+# - the display names, in order (what the dropdown lists)
+# - Model ID -> its position in that list (which one to pre-select)
+# A dictionary lookup finds the position instantly, instead of
+# looping through every model on every rerun
+OPENAI_MODEL_NAMES = list(OPENAI_MODEL_CHOICES)
+OPENAI_MODEL_POSITIONS = {model_id: position for position, model_id in enumerate(OPENAI_MODEL_CHOICES.values())}
+HF_MODEL_NAMES = list(HF_MODEL_CHOICES)
+HF_MODEL_POSITIONS = {model_id: position for position, model_id in enumerate(HF_MODEL_CHOICES.values())}
+
+# How many tokens each OpenAI model can handle in total (the "context
+# window"): the prompt we send PLUS the answer it writes must fit inside
+# If we ask for a longer answer than fits, OpenAI rejects the request
+OPENAI_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4o-mini": 128000,
+    "gpt-4": 8192,
+}
+
+# Context window to assume for a model that isn't listed above
+DEFAULT_CONTEXT_WINDOW = 4096
+
+# Tokens we keep free on top of our count, because OpenAI adds a few
+# hidden tokens per message (and our count may be an estimate)
+CONTEXT_SAFETY_TOKENS = 128
+
+# Shortest answer worth asking for (in tokens)
+# We shorten the conversation history to leave at least this much room,
+# and show an error rather than ask for an answer cut down to a few words
+MIN_ANSWER_TOKENS = 500
+
+# Room for each Deep Research note's heading, plus the short
+# "combine these notes" instruction that comes with them
+DEEP_RESEARCH_NOTES_OVERHEAD_TOKENS = 50
+
 # Hugging Face API settings
 # Hugging Face hosts AI models we can use for free
 HF_API_URL = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-medium"
@@ -115,63 +213,130 @@ HF_API_URL = "https://api-inference.huggingface.co/models/microsoft/DialoGPT-med
 # GPT-2 is larger and gives more detailed responses
 HF_DEEP_RESEARCH_URL = "https://api-inference.huggingface.co/models/gpt2"
 
-# Maximum number of messages to send as context
-# Why limit this? The AI can only handle so much text at once
-# Newer messages are more relevant anyway
-MAX_CONTEXT_MESSAGES = 10
+# Maximum size of the conversation history we send as context (in tokens)
+# A "token" is a chunk of text the AI reads - roughly 4 characters of English
+# Why limit this? The AI can only handle so much text at once,
+# and every extra token costs money and makes the answer slower
+# Why tokens and not "last 10 messages"? Message lengths vary a lot:
+# a few long messages can be huge, while many short ones are cheap
+# Newer messages are more relevant anyway, so we keep the newest ones
+MAX_CONTEXT_TOKENS = 3000
+
+# Most messages we even consider for that history (newest first)
+# The token budget above decides the final cut; this cap just means we
+# never copy (and hash, for the answer cache) a project's ENTIRE
+# history when only the last few turns could ever be sent
+MAX_HISTORY_MESSAGES = 40
+
+# Rough number of characters in one token (used to estimate token counts
+# when the optional "tiktoken" library isn't installed)
+CHARS_PER_TOKEN = 4
+
+# Which tiktoken "encoding" (word-splitting rules) to count tokens with
+# cl100k_base is the one used by GPT-3.5 Turbo and GPT-4
+TOKEN_ENCODING_NAME = "cl100k_base"
+
+# How many chat messages to show at once in the chat window
+# Long conversations are shown a "page" at a time (newest first);
+# a "Load earlier messages" button reveals older pages on request
+# Why? Drawing hundreds of messages on every rerun makes the app sluggish
+CHAT_PAGE_SIZE = 50
+
+# Labels for older messages, which are shown as one block of text
+# (only the newest message gets its own chat bubble)
+CHAT_ROLE_LABELS = {
+    "user": "🧑 You",
+    "assistant": "🤖 Assistant",
+}
 
 # Timeout for API calls (in seconds)
 # If the AI takes longer than this, we'll show an error
 # This prevents users from waiting forever
 API_TIMEOUT = 30
 
+# Timeout for the background "warm-up" call made when the app starts
+# (see start_connection_warmup) - it's only a courtesy, so keep it short
+WARMUP_TIMEOUT = 2
+
+# How many times to retry an API call that failed for a temporary reason
+# (rate limit "429", server hiccup "5xx", or a dropped connection)
+# Each retry waits longer than the last, plus a small random extra
+# ("jitter") so many users don't all retry at exactly the same moment
+API_MAX_RETRIES = 4
+
+# Longest we ever wait between two retries (in seconds)
+API_RETRY_MAX_WAIT = 30
+
+# Most Deep Research step requests per second we send (shared by all users)
+# Deep Research fires several requests at once; steps over this limit
+# wait a moment (without blocking anything) instead of failing with
+# "429 Too Many Requests" - see rate_limiter.py for how it works.
+# Normal one-at-a-time requests aren't limited here: waiting in them would
+# freeze that user's page, and the clients already retry a 429 for us.
+API_REQUESTS_PER_SECOND = 3
+
+# How many answers to remember for repeated questions (shared by all users)
+# When someone asks a question we've already answered in the same
+# conversation context (ignoring capital letters, punctuation and extra
+# spaces), we reuse that answer instead of paying for - and waiting on -
+# a new AI call. See response_cache.py for how it works
+RESPONSE_CACHE_MAX_ENTRIES = 200
+
+# How long a remembered answer stays valid (in seconds): 30 minutes
+RESPONSE_CACHE_TTL_SECONDS = 1800
+
+# Every error note we add to a streamed answer starts with this text
+# (so we know not to save a broken answer in the cache)
+STREAM_ERROR_PREFIX = "\n\n❌ "
+
 # ============================================
 # DEEP RESEARCH METHODOLOGY
 # ============================================
 # This section defines how "Deep Research Mode" works.
 # Like Gemini or Claude's deep research feature, we use
 # a special methodology for more thorough analysis.
+#
+# The methodology texts themselves (DEEP_RESEARCH_INSTRUCTIONS and
+# NORMAL_MODE_INSTRUCTIONS) live in system_prompts.py.
 
-# Deep Research System Prompt
-# This tells the AI how to behave in deep research mode
-DEEP_RESEARCH_INSTRUCTIONS = """
-You are operating in DEEP RESEARCH MODE. This means you should:
-
-1. **THINK STEP-BY-STEP**: Break down complex questions into smaller parts
-   - Identify what the user is really asking
-   - Consider multiple aspects of the question
-   - Build your answer methodically
-
-2. **PROVIDE COMPREHENSIVE ANALYSIS**: Don't just give quick answers
-   - Explain the "why" behind your recommendations
-   - Discuss pros and cons of different approaches
-   - Consider edge cases and potential issues
-
-3. **USE MULTIPLE PERSPECTIVES**: Look at questions from different angles
-   - Beginner perspective: Easy to understand explanations
-   - Advanced perspective: Technical details and best practices
-   - Practical perspective: Real-world examples and use cases
-
-4. **BE THOROUGH**: Provide more detail than usual
-   - Include code examples with detailed comments
-   - Explain how things work under the hood
-   - Suggest related topics to explore further
-
-5. **VERIFY ACCURACY**: Be more careful with information
-   - Double-check technical details
-   - Provide context for when advice applies
-   - Mention any limitations or caveats
-
-This mode is for users who want deep understanding, not just quick answers.
-"""
-
-# Normal Mode System Prompt
-# This is for regular, quick responses
-NORMAL_MODE_INSTRUCTIONS = """
-You are an expert Obsidian assistant. Provide clear, concise, and practical answers.
-Focus on being helpful and accurate while keeping responses reasonably brief.
-Include code examples when helpful, but keep explanations focused.
-"""
+# Deep Research Steps
+# In Deep Research Mode (OpenAI only), we ask the AI the same question
+# once per step (here: one step per perspective), then ask it to combine
+# the notes into one final answer.
+#
+# The steps form a small "workflow": a step can list other steps it
+# "depends_on", and it then receives their notes to build on.
+# Steps that don't depend on each other all run AT THE SAME TIME.
+#
+# WHY ASK IN PARALLEL?
+# - Each perspective gets the AI's full attention
+# - All three requests travel over the network together,
+#   so we wait for the slowest one instead of all three in a row
+#
+# Format: Step name -> {"instructions": what to focus on,
+#                       "depends_on": names of EARLIER steps it builds on}
+DEEP_RESEARCH_STEPS = {
+    "Beginner": {
+        "instructions": "Explain this for someone new to Obsidian. Use simple words and a step-by-step walkthrough.",
+        "depends_on": [],
+    },
+    "Advanced": {
+        "instructions": "Explain the technical details, best practices, edge cases, and how it works under the hood.",
+        "depends_on": [],
+    },
+    "Practical": {
+        "instructions": "Focus on real-world workflows, ready-to-copy examples, and common pitfalls.",
+        "depends_on": [],
+    },
+}
+
+# Maximum length of each perspective's notes
+# These are drafts for the final answer, so they can be shorter
+DEEP_RESEARCH_PERSPECTIVE_MAX_TOKENS = 800
+
+# Most Deep Research requests one question may have "in flight" at once
+# Keeps a big research workflow from flooding OpenAI's rate limit
+DEEP_RESEARCH_MAX_CONCURRENT = 5
 
 
 # ============================================
@@ -180,6 +345,37 @@ Include code examples when helpful, but keep explanations focused.
 # This function sets up the basic appearance of our page.
 # Run this once at the start of the app.
 
+# The welcome text shown under the title
+# Kept here (written once, already without indentation) instead of inside
+# setup_page(), so the same ready-made string is reused on every rerun
+WELCOME_MARKDOWN = """**Welcome to Aethelgard Academy™!** I'm here to help you master Obsidian, the powerful note-taking app.
+
+Ask me about:
+- 📊 **DataView** - Query your notes like a database
+- 📝 **Templater** - Create dynamic note templates
+- 🔗 **Linking & Organization** - Build your knowledge graph
+- 🔌 **Plugins** - Extend Obsidian's capabilities
+- 🔍 **Search & Queries** - Find exactly what you need
+
+**Tip:** Create different projects for different learning topics!
+
+---
+*Part of [Aethelgard Academy™](https://academy.questandcrossfire.com) by [QUEST AND CROSSFIRE™](https://questandcrossfire.com)*"""
+
+
+# The banner shown above the chat while Deep Research Mode is on
+# {model_name} is filled in by get_deep_research_banner()
+DEEP_RESEARCH_BANNER_TEMPLATE = """🔬 **Deep Research Mode is ACTIVE**
+
+**What this means:**
+- Using the strongest model: `{model_name}`
+- Step-by-step analysis methodology
+- Multiple perspectives considered
+- More thorough and detailed responses
+- Longer response length allowed
+
+*Like Gemini or Claude's deep research feature*"""
+
 
 def setup_page():
     """
@@ -202,21 +398,7 @@ def setup_page():
 
     # Add a description below the title
     # st.markdown() lets us use formatting (bold, italic, etc.)
-    st.markdown("""
-    **Welcome to Aethelgard Academy™!** I'm here to help you master Obsidian, the powerful note-taking app.
-
-    Ask me about:
-    - 📊 **DataView** - Query your notes like a database
-    - 📝 **Templater** - Create dynamic note templates
-    - 🔗 **Linking & Organization** - Build your knowledge graph
-    - 🔌 **Plugins** - Extend Obsidian's capabilities
-    - 🔍 **Search & Queries** - Find exactly what you need
-
-    **Tip:** Create different projects for different learning topics!
-
-    ---
-    *Part of [Aethelgard Academy™](https://academy.questandcrossfire.com) by [QUEST AND CROSSFIRE™](https://questandcrossfire.com)*
-    """)
+    st.markdown(WELCOME_MARKDOWN)
 
     # Add a horizontal line to separate header from content
     # st.divider() draws a line across the page
@@ -238,6 +420,37 @@ def setup_page():
 #     - Session state keeps data between page refreshes
 
 
+def create_project_manager():
+    """
+    Builds a fresh ProjectManager with a default project ready to use.
+
+    WHY NOT SHARE ONE MANAGER WITH st.cache_resource?
+    st.cache_resource hands the SAME object to every browser session.
+    Our ProjectManager holds the actual chat messages, so sharing it
+    would let every visitor read (and delete!) everyone else's
+    conversations. Building one is cheap (an empty dictionary plus one
+    project), so each session gets its own private copy instead.
+
+    Parameters: None
+
+    Returns:
+        ProjectManager: A manager containing a "General Questions" project
+
+    Example usage:
+        st.session_state.project_manager = create_project_manager()
+    """
+
+    # Create a new ProjectManager object
+    # This manages all our conversation projects
+    manager = ProjectManager()
+
+    # Create a default project so users can start immediately
+    # No project name? No problem! We create one automatically
+    manager.create_project("General Questions")
+
+    return manager
+
+
 def initialize_session_state():
     """
     Sets up session state variables if they don't exist yet.
@@ -260,13 +473,8 @@ def initialize_session_state():
     # st.session_state is like a dictionary that persists
     # If "project_manager" is not already in it, create it
     if "project_manager" not in st.session_state:
-        # Create a new ProjectManager object
-        # This manages all our conversation projects
-        st.session_state.project_manager = ProjectManager()
-
-        # Create a default project so users can start immediately
-        # No project name? No problem! We create one automatically
-        st.session_state.project_manager.create_project("General Questions")
+        # Build this session's own manager (with a default project)
+        st.session_state.project_manager = create_project_manager()
 
     # Check if we've run initial setup
     # This flag prevents us from running setup code multiple times
@@ -285,12 +493,15 @@ def initialize_session_state():
     #
     # Default: Try to read from secrets.toml, otherwise use OpenAI
     if "selected_api_provider" not in st.session_state:
-        # Try to get default from secrets.toml
-        try:
-            st.session_state.selected_api_provider = st.secrets.get("API_PROVIDER", "openai").lower()
-        except:
-            # If secrets.toml doesn't exist or has issues, default to OpenAI
-            st.session_state.selected_api_provider = "openai"
+        # Get default from secrets.toml (falls back to OpenAI)
+        provider = get_api_provider()
+
+        # Anything other than "openai" means Hugging Face (as everywhere
+        # else in the app) - the sidebar dropdown only knows these two
+        if provider not in PROVIDER_LABELS:
+            provider = "huggingface"
+
+        st.session_state.selected_api_provider = provider
 
     # ========================================
     # NEW: OpenAI Model Selection
@@ -304,7 +515,7 @@ def initialize_session_state():
     #
     # Default: gpt-3.5-turbo (fast and affordable)
     if "selected_openai_model" not in st.session_state:
-        st.session_state.selected_openai_model = "gpt-3.5-turbo"
+        st.session_state.selected_openai_model = pick_model("openai", False)
 
     # ========================================
     # NEW: Hugging Face Model Selection
@@ -318,7 +529,34 @@ def initialize_session_state():
     #
     # Default: microsoft/DialoGPT-medium (good balance)
     if "selected_hf_model" not in st.session_state:
-        st.session_state.selected_hf_model = "microsoft/DialoGPT-medium"
+        st.session_state.selected_hf_model = pick_model("huggingface", False)
+
+    # ========================================
+    # NEW: Chat History Paging
+    # ========================================
+    # Remember how many pages of old messages the user has loaded
+    # for each project: {project_name: number_of_pages}
+    # Projects not in here show just one page (the newest messages)
+    if "history_pages_shown" not in st.session_state:
+        st.session_state.history_pages_shown = {}
+
+    # ========================================
+    # NEW: Pending Notification
+    # ========================================
+    # A short "✓ Done" message to show after the next rerun
+    # (st.rerun() would wipe a message shown before it)
+    # None = nothing to show
+    if "pending_toast" not in st.session_state:
+        st.session_state.pending_toast = None
+
+    # ========================================
+    # NEW: Pending User Message
+    # ========================================
+    # The message just typed in the chat box, waiting to be answered
+    # (see remember_user_message and render_chat_interface)
+    # None = nothing to answer
+    if "pending_user_message" not in st.session_state:
+        st.session_state.pending_user_message = None
 
 
 # ============================================
@@ -328,256 +566,1333 @@ def initialize_session_state():
 # Think of them like translators between our app and the AI.
 
 
-def get_api_provider():
+@st.cache_resource(show_spinner=False)
+def get_token_encoder():
     """
-    Determines which API provider to use (OpenAI or Hugging Face).
+    Loads tiktoken's tokenizer ONCE, if the optional library is installed.
 
-    ⚠️ NOTE: This function is now DEPRECATED (not used anymore).
-    We now use session state instead: st.session_state.selected_api_provider
-    This allows users to switch providers via the UI dropdown.
+    tiktoken is OpenAI's own tokenizer: it splits text into exactly the
+    tokens the model sees. Loading its word lists takes a moment, so we
+    do it once and share the result (st.cache_resource).
 
-    LEGACY PURPOSE (kept for reference):
-    This function used to read API_PROVIDER from secrets.toml.
-    We keep it here in case we need to fall back to config file.
+    To use it, run: pip install tiktoken
 
     Parameters: None
 
     Returns:
-        string: "openai" or "huggingface"
+        The tiktoken encoding, or None if tiktoken isn't available
 
-    Example usage (OLD - don't use this anymore):
-        provider = get_api_provider()
-        if provider == "openai":
-            # Use OpenAI
+    Example usage:
+        encoder = get_token_encoder()
+        if encoder is not None:
+            print(len(encoder.encode("Hello")))
     """
 
     try:
-        # Check if user specified a provider in secrets.toml
-        provider = st.secrets.get("API_PROVIDER", DEFAULT_API_PROVIDER)
-        return provider.lower()  # Convert to lowercase for consistency
-    except:
-        # If secrets.toml doesn't exist or has no API_PROVIDER, use default
-        return DEFAULT_API_PROVIDER
+        import tiktoken
+        return tiktoken.get_encoding(TOKEN_ENCODING_NAME)
+    except Exception:
+        # Not installed, or its word lists couldn't be downloaded
+        # (e.g. no internet) - we'll use the character estimate instead
+        return None
 
 
-def get_api_key(provider=None):
+def estimate_token_count(text):
     """
-    Retrieves the appropriate API key based on the provider.
+    Counts (or estimates) how many tokens a piece of text uses.
 
-    Secrets are sensitive information (like passwords) stored securely.
-    We don't put API keys directly in code because:
-    1. It's a security risk if code is shared
-    2. Secrets are stored in a separate, secure file
+    With tiktoken installed we count exactly, using OpenAI's tokenizer.
+    Without it, a quick estimate is good enough for deciding how much
+    history fits: English text averages about 4 characters per token.
 
     Parameters:
-        provider (string): "openai" or "huggingface". If None, auto-detects.
+        text (string): The text to measure
 
     Returns:
-        string: The API key, or None if not found
+        integer: Number of tokens (exact or approximate)
 
     Example usage:
-        key = get_api_key("openai")
-        if key:
-            # Use the key
-        else:
-            # Show error to user
+        estimate_token_count("How do I link notes?")  # About 6
     """
 
-    # If no provider specified, detect it
-    if provider is None:
-        provider = get_api_provider()
+    encoder = get_token_encoder()
+    if encoder is not None:
+        # disallowed_special=() treats text like "<|endoftext|>" as
+        # ordinary words instead of raising an error
+        return len(encoder.encode(text, disallowed_special=()))
 
-    # Try to get the API key from secrets
-    # st.secrets is a special dictionary for sensitive info
-    # We use try/except because if the key doesn't exist, it causes an error
-    try:
-        if provider == "openai":
-            # Look for OPENAI_API_KEY in secrets.toml
-            api_key = st.secrets["OPENAI_API_KEY"]
-        else:
-            # Look for HF_API_KEY in secrets.toml
-            api_key = st.secrets["HF_API_KEY"]
+    # "//" divides and rounds down; +1 so short texts never count as 0
+    return len(text) // CHARS_PER_TOKEN + 1
 
-        return api_key
-    except:
-        # If key not found, return None
-        # The calling function will handle this error
+
+@st.cache_resource(show_spinner=False)
+def get_system_prompt_token_count(use_deep_research):
+    """
+    Counts the tokens in the system prompt ONCE per mode.
+
+    The system prompt (knowledge base + methodology) is the same for every
+    message, but it's several thousand characters long - so we count it
+    the first time and remember the number.
+
+    Parameters:
+        use_deep_research (boolean): True for the Deep Research prompt
+
+    Returns:
+        integer: Number of tokens in that system prompt
+
+    Example usage:
+        prompt_tokens = get_system_prompt_token_count(False)
+    """
+
+    return estimate_token_count(build_system_prompt(use_deep_research))
+
+
+def fit_max_tokens(model, messages, use_deep_research, max_tokens):
+    """
+    Shrinks the answer length if the prompt leaves too little room for it.
+
+    A model's context window must hold the prompt AND the answer. With a
+    long conversation, "up to 2500 tokens of answer" may not fit, and
+    OpenAI would reject the request. Here we ask for at most what fits.
+
+    Parameters:
+        model (string): The OpenAI model name
+        messages (list): The messages we're about to send (system message first)
+        use_deep_research (boolean): Which system prompt messages[0] holds
+        max_tokens (integer): The answer length we'd like
+
+    Returns:
+        integer: max_tokens, or less if that wouldn't fit.
+                 None if not even MIN_ANSWER_TOKENS fit - the prompt is
+                 too long, and a tiny answer would be useless
+
+    Example usage:
+        max_tokens = fit_max_tokens("gpt-4", messages, True, 2500)
+        if max_tokens is None:
+            print("Message too long for this model")
+    """
+
+    context_window = OPENAI_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+    # The system prompt's count is remembered; only the rest is counted now
+    prompt_tokens = get_system_prompt_token_count(use_deep_research)
+    for message in messages[1:]:
+        prompt_tokens += estimate_token_count(message["content"])
+
+    room_left = context_window - prompt_tokens - CONTEXT_SAFETY_TOKENS
+
+    # Not enough room for a real answer? Say so instead of asking for
+    # a handful of tokens (min() in case a short answer was requested)
+    if room_left < min(max_tokens, MIN_ANSWER_TOKENS):
         return None
 
+    return min(max_tokens, room_left)
+
 
-def send_message_to_openai(user_message, conversation_history, use_deep_research=False):
+def get_history_token_budget(model, user_message, use_deep_research):
     """
-    Sends a message to OpenAI's ChatGPT API and gets a response.
+    Works out how much conversation history fits for this model.
 
-    OpenAI's API is different from Hugging Face - it uses a chat format
-    where you send a list of messages with roles (system, user, assistant).
+    MAX_CONTEXT_TOKENS is the most history we ever send, but a model with
+    a small context window (like gpt-4, 8192 tokens) can't always take
+    that much: the system prompt, the new question, the Deep Research
+    notes and the answer all need room too. So we set aside room for
+    everything else first - including at least MIN_ANSWER_TOKENS for the
+    answer - and give the history whatever is left.
 
-    NEW: Deep Research Mode Support
-    When use_deep_research=True, this function:
-    1. Uses special methodology prompts (step-by-step analysis, multiple perspectives)
-    2. Allows longer responses (2500 tokens vs 1000)
-    3. Uses more focused temperature (0.5 vs 0.7)
-    4. Model selection is handled by session state (auto-switched by toggle)
+    Parameters:
+        model (string): The OpenAI model name
+        user_message (string): The new question
+        use_deep_research (boolean): True if Deep Research notes will be added
+
+    Returns:
+        integer: Tokens of history we can send (0 if none fits)
+
+    Example usage:
+        budget = get_history_token_budget("gpt-4", "How do I...?", True)
+        recent_messages = trim_history_to_token_budget(conversation_history, budget)
+    """
+
+    context_window = OPENAI_CONTEXT_WINDOWS.get(model, DEFAULT_CONTEXT_WINDOW)
+
+    reserved_tokens = (
+        get_system_prompt_token_count(use_deep_research)
+        + estimate_token_count(user_message)
+        + MIN_ANSWER_TOKENS
+        + CONTEXT_SAFETY_TOKENS
+    )
+
+    # Deep Research adds one set of notes per step before the final answer
+    if use_deep_research:
+        reserved_tokens += len(DEEP_RESEARCH_STEPS) * (
+            DEEP_RESEARCH_PERSPECTIVE_MAX_TOKENS + DEEP_RESEARCH_NOTES_OVERHEAD_TOKENS
+        )
+
+    # Never more than our usual limit, never less than nothing
+    return max(0, min(MAX_CONTEXT_TOKENS, context_window - reserved_tokens))
+
+
+def trim_history_to_token_budget(conversation_history, max_tokens=MAX_CONTEXT_TOKENS):
+    """
+    Keeps the newest messages whose combined size fits the token budget.
+
+    Think of packing a suitcase with a weight limit: we start with the
+    most important items (the newest messages) and stop as soon as the
+    next one would go over the limit.
 
     Parameters:
-        user_message (string): What the user just asked
-        conversation_history (list): Previous messages in this chat
-        use_deep_research (boolean): If True, use Deep Research methodology (like Gemini/Claude)
+        conversation_history (list): Messages as {"role": ..., "content": ...}
+        max_tokens (integer): The token budget for the history
 
     Returns:
-        dictionary: Contains "success" (True/False) and "response" (AI's answer or error message)
+        list: The newest messages that fit, in their original order
 
     Example usage:
-        result = send_message_to_openai("How do I use DataView?", [], use_deep_research=True)
-        if result["success"]:
-            print(result["response"])  # Will be thorough, step-by-step analysis
+        recent_messages = trim_history_to_token_budget(conversation_history)
     """
 
-    # Get API key
-    api_key = get_api_key("openai")
+    kept_messages = []
+    used_tokens = 0
 
-    # If no API key found, return error
-    if api_key is None:
-        return {
-            "success": False,
-            "response": "❌ OpenAI API key not found. Please set OPENAI_API_KEY in .streamlit/secrets.toml"
-        }
+    # reversed() walks from the newest message back to the oldest
+    for message in reversed(conversation_history):
+        message_tokens = estimate_token_count(message["content"])
 
-    # ========================================
-    # Choose which model to use
-    # ========================================
-    # NEW: Model selection now comes from session state (user's UI choice)
-    # The model dropdown in the sidebar controls which model we use
-    #
-    # WHY USE SESSION STATE?
-    # - User can switch models without changing code
-    # - Selection persists during the session
-    # - More flexible than hardcoded values
-    #
-    # OLD BEHAVIOR (kept for compatibility):
-    # If use_deep_research is True, we used to switch to advanced model
-    # Now we ignore this and use whatever the user selected in UI
+        # Stop once the next message doesn't fit anymore
+        if used_tokens + message_tokens > max_tokens:
+            break
 
-    # Get the model from session state (user's selection in sidebar)
-    model = st.session_state.selected_openai_model
+        kept_messages.append(message)
+        used_tokens = used_tokens + message_tokens
 
-    # Note: The model can also be auto-selected when Deep Research toggle is used
-    # The Deep Research toggle (in sidebar) automatically switches to GPT-4 when enabled
+    # We collected newest-first, so flip back to oldest-first
+    kept_messages.reverse()
 
-    try:
-        # Create OpenAI client
-        client = OpenAI(api_key=api_key)
+    return kept_messages
 
-        # ========================================
-        # Build System Prompt with Deep Research Methodology
-        # ========================================
-        # The system prompt tells the AI how to behave
-        # We change this based on whether Deep Research is enabled
 
-        # Get Obsidian knowledge context
-        obsidian_context = get_all_examples_as_context()
+def pick_model(provider, advanced):
+    """
+    Picks the default model for a provider and mode.
 
-        # Choose methodology based on Deep Research mode
-        if use_deep_research:
-            # DEEP RESEARCH MODE: Use comprehensive analysis methodology
-            methodology_instructions = DEEP_RESEARCH_INSTRUCTIONS
-        else:
-            # NORMAL MODE: Use quick, concise responses
-            methodology_instructions = NORMAL_MODE_INSTRUCTIONS
+    Deep Research Mode uses the strongest model; normal mode uses a
+    fast, affordable one. The choices live in the DEFAULT_MODELS table
+    (Section 2), so this is just one quick dictionary lookup.
 
-        # Build the complete system prompt
-        # Format: Methodology Instructions + Obsidian Knowledge
-        system_prompt = f"""{methodology_instructions}
+    Parameters:
+        provider (string): "openai" or "huggingface"
+        advanced (boolean): True for Deep Research Mode
 
-=== OBSIDIAN KNOWLEDGE BASE ===
-{obsidian_context}
+    Returns:
+        string: The model name
 
-Remember: Help users master Obsidian with clear explanations and practical examples."""
+    Example usage:
+        model = pick_model("openai", True)  # "gpt-4"
+    """
 
-        # Build messages list for OpenAI
-        # OpenAI expects messages in this format:
-        # [{"role": "system", "content": "You are..."}, {"role": "user", "content": "Hello"}]
-        messages = [
-            {
-                "role": "system",
-                "content": system_prompt
-            }
-        ]
+    return DEFAULT_MODELS[provider][advanced]
 
-        # Add recent conversation history
-        recent_messages = conversation_history[-MAX_CONTEXT_MESSAGES:]
-        for message in recent_messages:
-            messages.append({
-                "role": message["role"],
-                "content": message["content"]
-            })
 
-        # Add the new user message
-        messages.append({
-            "role": "user",
-            "content": user_message
-        })
+@st.cache_resource(show_spinner=False)
+def get_openai_client(api_key):
+    """
+    Returns ONE shared OpenAI client for the given API key.
 
-        # ========================================
-        # Configure API Parameters for Deep Research
-        # ========================================
-        # Different parameters based on mode for optimal results
+    Creating a client also creates a "connection pool" - a set of open
+    network connections to OpenAI's servers. Opening a secure connection
+    takes time (a "handshake"), so we want to keep reusing the same one.
 
-        if use_deep_research:
-            # DEEP RESEARCH MODE: Allow longer, more detailed responses
-            temperature = 0.5      # More focused and careful (less creative)
-            max_tokens = 2500      # Much longer responses for thorough analysis
-        else:
-            # NORMAL MODE: Quick, concise responses
-            temperature = 0.7      # Balanced creativity and focus
-            max_tokens = 1000      # Standard response length
+    Why st.cache_resource and not a normal variable?
+    Streamlit reruns this whole file on every click, so a normal
+    variable would be recreated every time. st.cache_resource keeps
+    the same object alive for as long as the app is running.
 
-        # Send request to OpenAI
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,   # How creative/focused the AI should be
-            max_tokens=max_tokens,     # Maximum length of response
-            timeout=API_TIMEOUT        # How long to wait before giving up
-        )
+    Parameters:
+        api_key (string): The OpenAI API key to use
 
-        # Extract the AI's response
-        ai_response = response.choices[0].message.content
+    Returns:
+        OpenAI: A ready-to-use client
 
-        # Clean up and return
-        ai_response = ai_response.strip()
+    Example usage:
+        client = get_openai_client(api_key)
+    """
 
-        return {
-            "success": True,
-            "response": ai_response
-        }
+    # Import here (not at the top) so the app starts faster - see Section 1
+    # Python remembers imported libraries, so this is only slow once
+    from openai import OpenAI
 
-    # Catch timeout errors
-    except Exception as error:
-        error_message = str(error)
+    # max_retries: the OpenAI library already retries rate limits (429),
+    # server errors and dropped connections with growing, jittered waits
+    # (and honours OpenAI's "retry-after" hint) - we just allow more tries
+    return OpenAI(api_key=api_key, max_retries=API_MAX_RETRIES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_response_cache():
+    """
+    Returns ONE shared cache of remembered answers.
+
+    st.cache_resource makes every user and every rerun share the same
+    cache, so a question answered once is instant for everyone.
+
+    Parameters: None
+
+    Returns:
+        ResponseCache: The shared answer cache
+
+    Example usage:
+        cached_answer = get_response_cache().get(cache_key)
+    """
+
+    return ResponseCache(
+        max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+        ttl_seconds=RESPONSE_CACHE_TTL_SECONDS
+    )
+
+
+def normalize_question(question):
+    """
+    Tidies up a question so small differences don't matter.
+
+    "How do I make a TABLE?" and "  how do I make a table?" are the same
+    question, so they should find the same remembered answer.
+    We only ignore upper/lower case and extra spaces. Everything else
+    stays: in Obsidian, symbols change the meaning ("[[link]]" is not
+    "#link", and "C++" is not "C#"), and questions in other languages
+    must keep all their letters.
+
+    Parameters:
+        question (string): The question as the user typed it
+
+    Returns:
+        string: The tidied question ("" if it was only spaces)
+
+    Example usage:
+        normalize_question("  How do I make a   TABLE? ")  # "how do i make a table?"
+    """
+
+    # casefold() is lower() that also works for every language
+    # split() with no arguments splits on any run of spaces, tabs or newlines
+    words = question.casefold().split()
+    return " ".join(words)
+
+
+def make_response_cache_key(provider, model, user_message, conversation_history):
+    """
+    Builds the cache key for a question in its conversation.
+
+    The same question can need a different answer depending on what was
+    said before ("And for tasks?"), so the key covers the whole
+    conversation - not just the question. Everything is turned into
+    JSON and then into a SHA-256 fingerprint: a short, fixed-size string
+    that is (practically) unique for every different input.
+
+    Parameters:
+        provider (string): "openai" or "huggingface"
+        model (string): The model that will answer
+        user_message (string): The new question
+        conversation_history (list): Previous messages in this chat
+
+    Returns:
+        string: A 64-character key
+
+    Example usage:
+        key = make_response_cache_key("openai", "gpt-3.5-turbo", "What is DataView?", [])
+    """
+
+    key_data = [
+        provider,
+        model,
+        normalize_question(user_message),
+        [[message["role"], message["content"]] for message in conversation_history],
+    ]
+
+    return hashlib.sha256(encode_json(key_data)).hexdigest()
+
+
+def stream_and_remember(response_stream, cache_key):
+    """
+    Passes a streamed answer through, then saves the whole thing in the cache.
+
+    Parameters:
+        response_stream: A generator of text pieces (from stream_openai_text or stream_tgi_text)
+        cache_key (string): Where to save the complete answer
+
+    Yields:
+        string: The same text pieces, unchanged
+
+    Example usage:
+        full_answer = st.write_stream(stream_and_remember(response_stream, cache_key))
+    """
+
+    answer_pieces = []
+    for text_piece in response_stream:
+        answer_pieces.append(text_piece)
+        yield text_piece
+
+    # Don't remember answers that broke halfway through
+    full_answer = "".join(answer_pieces)
+    if full_answer and STREAM_ERROR_PREFIX not in full_answer:
+        get_response_cache().set(cache_key, full_answer)
+
+
+@st.cache_resource(show_spinner=False)
+def get_rate_limiter():
+    """
+    Returns ONE shared rate limiter for the Deep Research fan-out.
+
+    st.cache_resource means all users and all reruns share the same
+    bucket, so together they stay under API_REQUESTS_PER_SECOND.
+    Only async code uses it (take_async), so waiting never blocks
+    Streamlit's own threads.
+
+    Parameters: None
+
+    Returns:
+        TokenBucket: The shared rate limiter
+
+    Example usage:
+        await get_rate_limiter().take_async()  # Wait for our turn, then send
+    """
+
+    return TokenBucket(rate=API_REQUESTS_PER_SECOND)
+
+
+@st.cache_resource(show_spinner=False)
+def get_async_openai_client(api_key):
+    """
+    Returns ONE shared async OpenAI client (used by Deep Research).
+
+    Same idea as get_openai_client: the client keeps its network
+    connections open, so every Deep Research question after the first
+    one skips the slow connection setup.
+
+    Parameters:
+        api_key (string): The OpenAI API key to use
+
+    Returns:
+        AsyncOpenAI: A ready-to-use async client
+
+    Example usage:
+        async_client = get_async_openai_client(api_key)
+    """
+
+    # Imported here (not at the top) so the app starts faster - see Section 1
+    from openai import AsyncOpenAI
+
+    # Same automatic retries as get_openai_client
+    return AsyncOpenAI(api_key=api_key, max_retries=API_MAX_RETRIES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_background_event_loop():
+    """
+    Starts ONE asyncio event loop that keeps running in the background.
+
+    An "event loop" is the engine that runs async code. asyncio.run()
+    would build a new engine for every question and throw it away
+    afterwards - together with the async client's open connections.
+    Instead we keep one engine running forever in its own thread, and
+    hand it work with run_in_background_loop().
+
+    Parameters: None
+
+    Returns:
+        asyncio.AbstractEventLoop: The running background loop
+
+    Example usage:
+        loop = get_background_event_loop()
+    """
+
+    loop = asyncio.new_event_loop()
+
+    # daemon=True: this thread won't stop the app from shutting down
+    loop_thread = threading.Thread(target=loop.run_forever, name="ai-event-loop", daemon=True)
+    loop_thread.start()
+
+    return loop
+
+
+def run_in_background_loop(coroutine):
+    """
+    Runs a coroutine on the background event loop and waits for its result.
+
+    Parameters:
+        coroutine: The coroutine to run (e.g. my_async_function(...))
+
+    Returns:
+        Whatever the coroutine returns
+
+    Example usage:
+        all_notes = run_in_background_loop(gather_deep_research_perspectives_async(...))
+    """
+
+    # run_coroutine_threadsafe() hands the work to the other thread and
+    # gives us a "future" - a ticket we can redeem for the result
+    future = asyncio.run_coroutine_threadsafe(coroutine, get_background_event_loop())
+
+    # .result() waits here until the work is done (or re-raises its error)
+    return future.result()
+
+
+@st.cache_resource(show_spinner=False)
+def get_http_session():
+    """
+    Returns ONE shared requests.Session for talking to Hugging Face.
+
+    requests.post() opens a brand-new connection for every call.
+    A Session keeps connections open ("keep-alive") and reuses them,
+    so later calls skip the slow connection setup.
+
+    We also tell the session to retry a few times (waiting a little
+    longer each time) if the connection fails, or if the server says
+    it's busy (429 "Too Many Requests") or had a temporary hiccup (5xx).
+
+    Parameters: None
+
+    Returns:
+        requests.Session: A session with connection pooling and retries
+
+    Example usage:
+        response = get_http_session().post(url, headers=headers, data=encode_json(payload))
+    """
+
+    session = requests.Session()
+
+    # Retry up to API_MAX_RETRIES times, waiting about 0.5s, 1s, 2s, 4s
+    # between tries plus up to 0.5s of random "jitter" (never more than
+    # API_RETRY_MAX_WAIT), or as long as the server asks in its
+    # "Retry-After" header
+    retry_policy = Retry(
+        total=API_MAX_RETRIES,
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        backoff_max=API_RETRY_MAX_WAIT,
+        # Status codes that mean "try again in a moment"
+        status_forcelist=[429, 500, 502, 503, 504],
+        # By default only "safe" methods like GET are retried;
+        # our AI calls are POSTs, and re-asking a question is harmless
+        allowed_methods=["GET", "HEAD", "POST"],
+        # After the last try, hand back the error response instead of
+        # raising, so our normal "status code" error message is shown
+        raise_on_status=False
+    )
+
+    # Keep up to 16 connections open for reuse
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry_policy)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)   # e.g. a TGI server on your own network
+
+    return session
+
+
+def warm_up_connections(provider, api_key, tgi_url):
+    """
+    Opens the connection to the AI service before anyone asks a question.
+
+    The very first question would otherwise pay for everything at once:
+    importing the OpenAI library, looking up the server's address and
+    the secure (TLS) "handshake". Here we do that work in the background
+    with a tiny request, so the connection is already open in the shared
+    pool when the first real question arrives.
+
+    Runs in its own thread (see start_connection_warmup).
+
+    Parameters:
+        provider (string): "openai" or "huggingface"
+        api_key (string): The API key for that provider (may be None)
+        tgi_url (string): Our own TGI server address, or None
+
+    Returns:
+        None
+
+    Example usage:
+        warm_up_connections("openai", api_key, None)
+    """
+
+    # Warming up is only a nice extra - if anything goes wrong (no
+    # internet, wrong key...), we quietly skip it. The real question
+    # will then report the problem properly.
+    try:
+        if provider == "openai":
+            if api_key:
+                # Creating the shared client also imports the OpenAI library
+                client = get_openai_client(api_key)
+
+                # Listing the models is a cheap request that opens the
+                # connection (no retries - we don't want to wait around)
+                client.with_options(timeout=WARMUP_TIMEOUT, max_retries=0).models.list()
+        else:
+            # A HEAD request asks only for the headers, not the page
+            get_http_session().head(tgi_url or HF_API_URL, timeout=WARMUP_TIMEOUT)
+    except Exception:
+        pass
+
+
+@st.cache_resource(show_spinner=False)
+def start_connection_warmup():
+    """
+    Starts warm_up_connections() in a background thread, ONCE per server.
+
+    @st.cache_resource makes sure this only happens the first time the
+    app runs, not on every click. The page is drawn right away while the
+    warm-up happens behind the scenes.
+
+    Parameters: None
+
+    Returns:
+        threading.Thread: The warm-up thread (already started)
+
+    Example usage:
+        start_connection_warmup()
+    """
+
+    # Read the settings here (in the app's own thread), then hand them
+    # to the background thread
+    provider = get_api_provider()
+    warmup_thread = threading.Thread(
+        target=warm_up_connections,
+        args=(provider, get_api_key(provider), get_hf_tgi_url()),
+        name="connection-warmup",
+        daemon=True   # Won't stop the app from shutting down
+    )
+    warmup_thread.start()
+
+    return warmup_thread
+
+
+def encode_json(data):
+    """
+    Turns Python data (dicts, lists, ...) into JSON bytes for an API request.
+
+    Uses orjson when available - it's several times faster than the
+    built-in json module and gives us bytes directly, which is exactly
+    what requests sends over the network.
+
+    Parameters:
+        data: Any JSON-compatible Python value
+
+    Returns:
+        bytes: The JSON text, UTF-8 encoded
+
+    Example usage:
+        body = encode_json({"inputs": "Hello"})  # b'{"inputs":"Hello"}'
+    """
+
+    if orjson is not None:
+        return orjson.dumps(data)
+
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+def decode_json(raw_bytes):
+    """
+    Turns JSON bytes from an API response back into Python data.
+
+    Parameters:
+        raw_bytes (bytes): The raw response body (response.content)
+
+    Returns:
+        The parsed Python value (usually a dict or list)
+
+    Example usage:
+        data = decode_json(b'[{"generated_text": "Hi"}]')
+        print(data[0]["generated_text"])  # "Hi"
+    """
+
+    if orjson is not None:
+        return orjson.loads(raw_bytes)
+
+    return json.loads(raw_bytes)
+
+
+@st.cache_data(show_spinner=False)
+def get_api_provider():
+    """
+    Reads the default API provider (OpenAI or Hugging Face) from secrets.toml.
+
+    The user picks the provider in the sidebar dropdown and we store that
+    choice in st.session_state.selected_api_provider. This function only
+    decides which option the dropdown starts with.
+
+    Why @st.cache_data?
+    Streamlit reruns the script on every click. The secrets file doesn't
+    change while the app runs, so we read it once and reuse the answer.
+
+    Parameters: None
+
+    Returns:
+        string: "openai" or "huggingface"
+
+    Example usage:
+        st.session_state.selected_api_provider = get_api_provider()
+    """
+
+    try:
+        # Check if user specified a provider in secrets.toml
+        provider = st.secrets.get("API_PROVIDER", DEFAULT_API_PROVIDER)
+        return provider.lower()  # Convert to lowercase for consistency
+    except FileNotFoundError:
+        # secrets.toml doesn't exist - use the default
+        # (Streamlit's "secrets not found" error is a kind of FileNotFoundError)
+        return DEFAULT_API_PROVIDER
+
+
+@st.cache_data(show_spinner=False)
+def get_hf_tgi_url():
+    """
+    Reads the address of our own Hugging Face TGI server from secrets.toml.
+
+    TGI ("Text Generation Inference") is Hugging Face's server for running
+    a model yourself. Unlike the free Inference API it handles many
+    requests together ("continuous batching") and can stream the answer
+    word by word, so it is much faster when it's available.
+
+    Add it to .streamlit/secrets.toml like this (optional):
+        HF_TGI_URL = "https://my-tgi-server.example.com"
+
+    Parameters: None
+
+    Returns:
+        string: The server address (without a trailing "/"), or None if not set
+
+    Example usage:
+        tgi_url = get_hf_tgi_url()
+        if tgi_url:
+            # Use our own TGI server
+    """
+
+    try:
+        tgi_url = st.secrets.get("HF_TGI_URL")
+    except FileNotFoundError:
+        # No secrets.toml at all - so no TGI server either
+        return None
+
+    if not tgi_url:
+        return None
+
+    # Remove a trailing "/" so we can safely add "/generate" later
+    return tgi_url.rstrip("/")
+
+
+@st.cache_data(show_spinner=False)
+def get_api_key(provider=None):
+    """
+    Retrieves the appropriate API key based on the provider.
+
+    Secrets are sensitive information (like passwords) stored securely.
+    We don't put API keys directly in code because:
+    1. It's a security risk if code is shared
+    2. Secrets are stored in a separate, secure file
+
+    Why @st.cache_data?
+    Every question asks for the key, and every lookup goes back to the
+    secrets file. Like get_api_provider, we read it once per provider
+    and reuse the answer. If you edit secrets.toml while the app is
+    running, choose "Clear cache" in Streamlit's menu (or press C) so
+    the new key is picked up.
+
+    Parameters:
+        provider (string): "openai" or "huggingface". If None, auto-detects.
+
+    Returns:
+        string: The API key, or None if not found
+
+    Example usage:
+        key = get_api_key("openai")
+        if key:
+            # Use the key
+        else:
+            # Show error to user
+    """
+
+    # If no provider specified, detect it
+    if provider is None:
+        provider = get_api_provider()
+
+    # Try to get the API key from secrets
+    # st.secrets is a special dictionary for sensitive info
+    # We use try/except because if the key doesn't exist, it causes an error
+    try:
+        if provider == "openai":
+            # Look for OPENAI_API_KEY in secrets.toml
+            api_key = st.secrets["OPENAI_API_KEY"]
+        else:
+            # Look for HF_API_KEY in secrets.toml
+            api_key = st.secrets["HF_API_KEY"]
+
+        return api_key
+    # KeyError: secrets.toml exists but doesn't have this key
+    # FileNotFoundError: there is no secrets.toml at all
+    # (We only catch these two, so real bugs still show up)
+    except (KeyError, FileNotFoundError):
+        # If key not found, return None
+        # The calling function will handle this error
+        return None
+
+
+async def ask_openai_perspective(async_client, rate_limiter, model, messages, perspective_instructions, earlier_notes=""):
+    """
+    Asks OpenAI for one perspective's notes on the user's question.
+
+    This is one "worker" of Deep Research Mode. Several of these run
+    at the same time (see gather_deep_research_perspectives).
+
+    "async def" makes this a coroutine: a function that can pause while
+    it waits for the network, letting other coroutines run meanwhile.
+    The "await" keyword marks the spot where it pauses.
+
+    Parameters:
+        async_client (AsyncOpenAI): The async OpenAI client to send the request with
+        rate_limiter (TokenBucket): The shared rate limiter (from get_rate_limiter)
+        model (string): Which OpenAI model to use
+        messages (list): The full conversation, ending with the user's question
+        perspective_instructions (string): What this perspective should focus on
+        earlier_notes (string): Notes from the steps this one depends on (if any)
+
+    Returns:
+        string: This perspective's notes
+
+    Example usage:
+        notes = await ask_openai_perspective(async_client, rate_limiter, "gpt-4", messages, "Explain simply.")
+    """
+
+    step_instruction = f"Answer the question above from this perspective only: {perspective_instructions}"
+
+    # Steps that depend on earlier steps get to read their notes first
+    if earlier_notes:
+        step_instruction += f"\n\nBuild on these notes from earlier research steps:\n\n{earlier_notes}"
+
+    # Copy the conversation and add the perspective as a final instruction
+    # We copy the list (with +) so the original messages stay unchanged
+    perspective_messages = messages + [
+        {
+            "role": "system",
+            "content": step_instruction
+        }
+    ]
+
+    # Wait for our turn without blocking the other perspectives
+    await rate_limiter.take_async()
+
+    response = await async_client.chat.completions.create(
+        model=model,
+        messages=perspective_messages,
+        temperature=0.5,
+        max_tokens=DEEP_RESEARCH_PERSPECTIVE_MAX_TOKENS,
+        timeout=API_TIMEOUT,
+        # Same system prompt as the final deep research call, so share its cache
+        extra_body={"prompt_cache_key": PROMPT_CACHE_KEYS[True]}
+    )
+
+    # content can be None (e.g. if the model refused), so fall back to ""
+    return (response.choices[0].message.content or "").strip()
+
+
+async def gather_deep_research_perspectives_async(async_client, rate_limiter, model, messages):
+    """
+    Runs every Deep Research step, each as soon as its inputs are ready.
+
+    Every step becomes an asyncio "task" (a coroutine that is already
+    scheduled to run). A step first waits for the tasks of the steps it
+    depends on, then sends its own request. Steps without dependencies
+    all start right away, so independent requests travel together.
+
+    asyncio.gather() then waits until every task has finished.
+    A Semaphore (a counter of free "slots") makes sure no more than
+    DEEP_RESEARCH_MAX_CONCURRENT requests are sent at the same time.
+
+    Parameters:
+        async_client (AsyncOpenAI): The shared async OpenAI client
+        rate_limiter (TokenBucket): The shared rate limiter
+        model (string): Which OpenAI model to use
+        messages (list): The full conversation, ending with the user's question
+
+    Returns:
+        list: One result per step, in DEEP_RESEARCH_STEPS order - the notes
+              string, or the error (exception) if that step failed
+    """
+
+    # Only this many steps may be talking to OpenAI at the same time
+    request_slots = asyncio.Semaphore(DEEP_RESEARCH_MAX_CONCURRENT)
+
+    # Step name -> its running task (filled in by the loop below)
+    step_tasks = {}
+
+    async def run_step(step):
+        # Wait for the steps this one builds on and collect their notes
+        # (awaiting a finished task just hands back its result again)
+        earlier_notes = []
+        for dependency_name in step["depends_on"]:
+            dependency_notes = await step_tasks[dependency_name]
+            earlier_notes.append(f"### {dependency_name}\n{dependency_notes}")
+
+        # Take a free slot (or wait for one) only now, so steps that are
+        # still waiting for their dependencies don't block anyone
+        async with request_slots:
+            return await ask_openai_perspective(
+                async_client, rate_limiter, model, messages, step["instructions"], "\n\n".join(earlier_notes)
+            )
+
+    for step_name, step in DEEP_RESEARCH_STEPS.items():
+        # Only allow steps listed EARLIER as dependencies
+        # (this also makes it impossible for two steps to wait on each other forever)
+        for dependency_name in step["depends_on"]:
+            if dependency_name not in step_tasks:
+                raise ValueError(f"Step '{step_name}' depends on '{dependency_name}', which must come before it")
+
+        step_tasks[step_name] = asyncio.create_task(run_step(step))
+
+    # Wait for every step to finish
+    # The * "unpacks" the list into separate arguments
+    # return_exceptions=True: if one step fails, we still get the others'
+    # notes (the failed step's error comes back in its place)
+    return await asyncio.gather(*step_tasks.values(), return_exceptions=True)
+
+
+def gather_deep_research_perspectives(api_key, model, messages):
+    """
+    Asks OpenAI for every Deep Research perspective IN PARALLEL.
+
+    Instead of waiting for the beginner notes, THEN the advanced notes,
+    THEN the practical notes, we send all requests at once.
+    The total wait is roughly the time of the slowest request.
+
+    Think of it like ordering at three food stands at the same time
+    instead of standing in each line one after another.
+
+    Parameters:
+        api_key (string): The OpenAI API key
+        model (string): Which OpenAI model to use
+        messages (list): The full conversation, ending with the user's question
+
+    Returns:
+        string: All perspective notes combined, with a heading for each
+                (perspectives that failed are left out)
+
+    Example usage:
+        notes = gather_deep_research_perspectives(api_key, "gpt-4", messages)
+    """
+
+    # Look up the shared client and rate limiter here, in Streamlit's own
+    # thread, then hand the work to the background event loop
+    # (the loop and the client live on, so connections are reused next time)
+    async_client = get_async_openai_client(api_key)
+    rate_limiter = get_rate_limiter()
+    all_notes = run_in_background_loop(
+        gather_deep_research_perspectives_async(async_client, rate_limiter, model, messages)
+    )
+
+    # Pair each step name with its notes and add a heading
+    # Steps that failed are skipped - the final answer uses the rest
+    notes_sections = []
+    step_errors = []
+    for perspective_name, notes in zip(DEEP_RESEARCH_STEPS, all_notes):
+        if isinstance(notes, Exception):
+            step_errors.append(notes)
+            continue
+        notes_sections.append(f"### {perspective_name} perspective\n{notes}")
+
+    # If EVERY step failed, there's nothing to combine - report the problem
+    if not notes_sections and step_errors:
+        raise step_errors[0]
+
+    return "\n\n".join(notes_sections)
+
+
+def stream_openai_text(response_stream):
+    """
+    Yields the text of a streaming OpenAI response, piece by piece.
+
+    With stream=True, OpenAI sends the answer in small "chunks" as soon
+    as each part is written, instead of one big reply at the end.
+    This function is a "generator": each "yield" hands one piece of
+    text to whoever is looping over it (here: st.write_stream).
+
+    Parameters:
+        response_stream: The object returned by client.chat.completions.create(..., stream=True)
+
+    Yields:
+        string: The next piece of the AI's answer
+
+    Example usage:
+        for text_piece in stream_openai_text(response_stream):
+            print(text_piece, end="")
+    """
+
+    try:
+        for chunk in response_stream:
+            # Some chunks carry no text (e.g. the final "I'm done" chunk)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    # The connection can still break halfway through the answer
+    # Show what went wrong right after the text we already received
+    except Exception as error:
+        yield f"{STREAM_ERROR_PREFIX}OpenAI API Error: {error}"
+
+
+def stream_tgi_text(response):
+    """
+    Yields the text of a streaming TGI response, piece by piece.
+
+    TGI streams "server-sent events": lines that look like
+        data: {"token": {"text": "Hello", "special": false}, ...}
+    Each line carries one new piece ("token") of the answer.
+
+    Parameters:
+        response (requests.Response): A response opened with stream=True
+
+    Yields:
+        string: The next piece of the AI's answer
+
+    Example usage:
+        for text_piece in stream_tgi_text(response):
+            print(text_piece, end="")
+    """
+
+    try:
+        # iter_lines() gives us each line as soon as it arrives
+        for line in response.iter_lines():
+            # Skip blank lines and anything that isn't a data line
+            if not line.startswith(b"data:"):
+                continue
+
+            # Cut off "data:" and read the JSON after it
+            event = decode_json(line[len(b"data:"):])
+
+            # The server can report an error halfway through
+            if "error" in event:
+                yield f"{STREAM_ERROR_PREFIX}TGI Error: {event['error']}"
+                return
+
+            # "Special" tokens are markers like end-of-text, not real words
+            token = event.get("token", {})
+            if token.get("text") and not token.get("special"):
+                yield token["text"]
+
+    # The connection can still break halfway through the answer
+    except Exception as error:
+        yield f"{STREAM_ERROR_PREFIX}TGI Error: {error}"
+
+    # Always give the connection back to the session when we're done
+    finally:
+        response.close()
+
+
+def send_prompt_to_tgi(tgi_url, headers, prompt, max_new_tokens, temperature, stream=False):
+    """
+    Sends a finished prompt to our own TGI server.
+
+    Parameters:
+        tgi_url (string): The TGI server address (from get_hf_tgi_url)
+        headers (dict): Request headers (including the Authorization key)
+        prompt (string): The full prompt text
+        max_new_tokens (integer): Maximum length of the answer
+        temperature (float): How creative/focused the AI should be
+        stream (boolean): If True, "response" is a generator of text pieces
+
+    Returns:
+        dictionary: Contains "success" (True/False) and "response"
+
+    Example usage:
+        result = send_prompt_to_tgi(tgi_url, headers, "User: Hi\nAssistant: ", 500, 0.7)
+    """
+
+    # TGI's settings have slightly different names than the Inference API
+    payload = {
+        "inputs": prompt,
+        "parameters": {
+            "max_new_tokens": max_new_tokens,
+            "temperature": temperature,
+            "return_full_text": False,
+        }
+    }
+
+    if stream:
+        # /generate_stream sends the answer as it's written
+        # stream=True tells requests not to wait for the whole body
+        response = get_http_session().post(
+            f"{tgi_url}/generate_stream",
+            headers=headers,
+            data=encode_json(payload),
+            timeout=API_TIMEOUT,
+            stream=True
+        )
+
+        if response.status_code != 200:
+            response.close()
+            return {
+                "success": False,
+                "response": f"❌ TGI Error: Status code {response.status_code}. Please check HF_TGI_URL and try again."
+            }
+
+        return {
+            "success": True,
+            "response": stream_tgi_text(response)
+        }
+
+    # /generate waits and returns the whole answer: {"generated_text": "..."}
+    response = get_http_session().post(
+        f"{tgi_url}/generate",
+        headers=headers,
+        data=encode_json(payload),
+        timeout=API_TIMEOUT
+    )
+
+    if response.status_code != 200:
+        return {
+            "success": False,
+            "response": f"❌ TGI Error: Status code {response.status_code}. Please check HF_TGI_URL and try again."
+        }
+
+    return {
+        "success": True,
+        "response": decode_json(response.content)["generated_text"].strip()
+    }
+
+
+def send_message_to_openai(user_message, conversation_history, use_deep_research=False, stream=False):
+    """
+    Sends a message to OpenAI's ChatGPT API and gets a response.
+
+    OpenAI's API is different from Hugging Face - it uses a chat format
+    where you send a list of messages with roles (system, user, assistant).
+
+    NEW: Deep Research Mode Support
+    When use_deep_research=True, this function:
+    1. Uses special methodology prompts (step-by-step analysis, multiple perspectives)
+    2. Allows longer responses (2500 tokens vs 1000)
+    3. Uses more focused temperature (0.5 vs 0.7)
+    4. Model selection is handled by session state (auto-switched by toggle)
+    5. Asks for beginner/advanced/practical notes in parallel, then combines them
+
+    NEW: Streaming Support
+    When stream=True, "response" is a generator that yields the answer
+    piece by piece as OpenAI writes it, so users see text immediately.
+
+    Parameters:
+        user_message (string): What the user just asked
+        conversation_history (list): Previous messages in this chat
+        use_deep_research (boolean): If True, use Deep Research methodology (like Gemini/Claude)
+        stream (boolean): If True, return the answer as a stream of text pieces
+
+    Returns:
+        dictionary: Contains "success" (True/False) and "response" (AI's answer or error message)
+
+    Example usage:
+        result = send_message_to_openai("How do I use DataView?", [], use_deep_research=True)
+        if result["success"]:
+            print(result["response"])  # Will be thorough, step-by-step analysis
+    """
+
+    # Get API key
+    api_key = get_api_key("openai")
+
+    # If no API key found, return error
+    if api_key is None:
+        return {
+            "success": False,
+            "response": "❌ OpenAI API key not found. Please set OPENAI_API_KEY in .streamlit/secrets.toml"
+        }
+
+    # ========================================
+    # Choose which model to use
+    # ========================================
+    # NEW: Model selection now comes from session state (user's UI choice)
+    # The model dropdown in the sidebar controls which model we use
+    #
+    # WHY USE SESSION STATE?
+    # - User can switch models without changing code
+    # - Selection persists during the session
+    # - More flexible than hardcoded values
+    #
+    # OLD BEHAVIOR (kept for compatibility):
+    # If use_deep_research is True, we used to switch to advanced model
+    # Now we ignore this and use whatever the user selected in UI
+
+    # Get the model from session state (user's selection in sidebar)
+    model = st.session_state.selected_openai_model
+
+    # Note: The model can also be auto-selected when Deep Research toggle is used
+    # The Deep Research toggle (in sidebar) automatically switches to GPT-4 when enabled
+
+    # The error types OpenAI raises, so we can tell problems apart by TYPE
+    # (imported here, like the client, so app start stays fast)
+    from openai import (
+        APIConnectionError,
+        APIError,
+        APITimeoutError,
+        AuthenticationError,
+        RateLimitError,
+    )
+
+    try:
+        # Get the shared OpenAI client (created once, reused every message)
+        client = get_openai_client(api_key)
+
+        # ========================================
+        # Build System Prompt with Deep Research Methodology
+        # ========================================
+        # The system prompt tells the AI how to behave
+        # We change this based on whether Deep Research is enabled
+
+        # Build messages list for OpenAI
+        # OpenAI expects messages in this format:
+        # [{"role": "system", "content": "You are..."}, {"role": "user", "content": "Hello"}]
+        #
+        # In one go we list:
+        # 1. The system message (built once per mode, then the SAME object is reused)
+        # 2. Recent conversation history (newest messages that fit the budget)
+        # 3. The new user message
+        # The "*" unpacks the history messages into the list
+        # The budget depends on the model: small context windows get less
+        # history, so there's always room left for a real answer
+        history_budget = get_history_token_budget(model, user_message, use_deep_research)
+        recent_messages = trim_history_to_token_budget(conversation_history, history_budget)
+        messages = [
+            build_system_message(use_deep_research),
+            *[{"role": message["role"], "content": message["content"]} for message in recent_messages],
+            {"role": "user", "content": user_message}
+        ]
+
+        # ========================================
+        # Configure API Parameters for Deep Research
+        # ========================================
+        # Different parameters based on mode for optimal results
+
+        if use_deep_research:
+            # DEEP RESEARCH MODE: Allow longer, more detailed responses
+            temperature = 0.5      # More focused and careful (less creative)
+            max_tokens = 2500      # Much longer responses for thorough analysis
+        else:
+            # NORMAL MODE: Quick, concise responses
+            temperature = 0.7      # Balanced creativity and focus
+            max_tokens = 1000      # Standard response length
+
+        # ========================================
+        # Deep Research: Gather Perspectives in Parallel
+        # ========================================
+        # First collect notes from every perspective (all at once),
+        # then hand those notes to the AI as material for the final answer
+
+        if use_deep_research:
+            perspective_notes = gather_deep_research_perspectives(api_key, model, messages)
+
+            messages.append({
+                "role": "system",
+                "content": f"""Research notes from several perspectives:
+
+{perspective_notes}
+
+Combine these notes into one complete, well-structured answer to the user's question.
+Follow the deep research methodology and remove any repetition."""
+            })
+
+        # Make sure the answer still fits next to the prompt
+        max_tokens = fit_max_tokens(model, messages, use_deep_research, max_tokens)
+        if max_tokens is None:
+            # Even with no history, the message itself is too long
+            return {
+                "success": False,
+                "response": f"❌ Your message is too long for {model}. Please shorten it, or pick a model with a larger context window (like GPT-4o Mini)."
+            }
+
+        # Send request to OpenAI
+        response = client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,   # How creative/focused the AI should be
+            max_tokens=max_tokens,     # Maximum length of response
+            timeout=API_TIMEOUT,       # How long to wait before giving up
+            stream=stream,             # Send the answer piece by piece?
+            # Tell OpenAI which cached prompt prefix this request shares
+            # (extra_body passes settings the client doesn't list by name)
+            extra_body={"prompt_cache_key": PROMPT_CACHE_KEYS[use_deep_research]}
+        )
+
+        # STREAMING: hand back a generator that yields each piece as it arrives
+        # (nothing has been read yet - the caller pulls the pieces)
+        if stream:
+            return {
+                "success": True,
+                "response": stream_openai_text(response)
+            }
+
+        # Extract the AI's response
+        # content can be None (e.g. a refusal or a tool call), so fall back to ""
+        ai_response = response.choices[0].message.content or ""
+
+        # Clean up and return
+        ai_response = ai_response.strip()
+
+        return {
+            "success": True,
+            "response": ai_response
+        }
 
-        # Check if it's an authentication error
-        if "authentication" in error_message.lower() or "api key" in error_message.lower():
-            return {
-                "success": False,
-                "response": "❌ Invalid OpenAI API key. Please check your OPENAI_API_KEY in secrets.toml"
-            }
+    # ========================================
+    # Handle Errors by Type
+    # ========================================
+    # Each kind of problem has its own error class, so we don't have to
+    # search the error text for words like "quota".
+    # Note: the client already retried the temporary ones (rate limits,
+    # timeouts, 5xx) before we get here - honoring OpenAI's "retry-after"
+    # header - so these are the final answers.
+
+    # Wrong or revoked key - retrying can never fix this
+    except AuthenticationError:
+        return {
+            "success": False,
+            "response": "❌ Invalid OpenAI API key. Please check your OPENAI_API_KEY in secrets.toml"
+        }
 
-        # Check if it's a quota/billing error
-        if "quota" in error_message.lower() or "billing" in error_message.lower():
+    # Too many requests, or no credit left on the account
+    except RateLimitError as error:
+        # "insufficient_quota" means billing, not speed
+        if error.code == "insufficient_quota":
             return {
                 "success": False,
                 "response": "❌ OpenAI API quota exceeded. Please check your billing at https://platform.openai.com/account/billing"
             }
 
-        # General error
         return {
             "success": False,
-            "response": f"❌ OpenAI API Error: {error_message}"
+            "response": "❌ OpenAI is receiving too many requests right now. Please wait a moment and try again."
+        }
+
+    # OpenAI took too long to answer
+    # (checked before APIConnectionError, because a timeout is a kind of it)
+    except APITimeoutError:
+        return {
+            "success": False,
+            "response": f"❌ Request timed out after {API_TIMEOUT} seconds. OpenAI might be overloaded. Please try again."
+        }
+
+    # We couldn't reach OpenAI at all (no internet, DNS, firewall...)
+    except APIConnectionError:
+        return {
+            "success": False,
+            "response": "❌ Could not connect to OpenAI. Please check your internet connection."
         }
 
+    # Any other error OpenAI reported (bad request, server error...)
+    except APIError as error:
+        return {
+            "success": False,
+            "response": f"❌ OpenAI API Error: {error}"
+        }
+
+    # Anything else (a bug, a reply we didn't expect...)
+    # Still answer with an error message instead of crashing the page
+    except Exception as error:
+        return {
+            "success": False,
+            "response": f"❌ Unexpected error: {error}"
+        }
 
-def send_message_to_ai(user_message, conversation_history, use_deep_research=False):
+
+def send_message_to_ai(user_message, conversation_history, use_deep_research=False, stream=False):
     """
     Sends a message to the AI and gets a response.
 
@@ -586,8 +1901,9 @@ def send_message_to_ai(user_message, conversation_history, use_deep_research=Fal
 
     This is the heart of our app! It:
     1. Detects which API provider to use
-    2. Routes the request to the appropriate function
-    3. Returns the AI's response
+    2. Reuses a remembered answer if this question was asked before
+    3. Routes the request to the appropriate function
+    4. Returns the AI's response
 
     Think of it like a telephone operator:
     - You make a call (send a message)
@@ -598,6 +1914,7 @@ def send_message_to_ai(user_message, conversation_history, use_deep_research=Fal
         user_message (string): What the user just asked
         conversation_history (list): Previous messages in this chat
         use_deep_research (boolean): If True, use better model
+        stream (boolean): If True, a successful "response" is a generator of text pieces
 
     Returns:
         dictionary: Contains "success" (True/False) and "response" (AI's answer or error message)
@@ -608,6 +1925,11 @@ def send_message_to_ai(user_message, conversation_history, use_deep_research=Fal
             print(result["response"])
         else:
             print(f"Error: {result['response']}")
+
+        # Streaming: show the answer while it's being written
+        result = send_message_to_ai("How do I use DataView?", [], stream=True)
+        if result["success"]:
+            full_answer = st.write_stream(result["response"])
     """
 
     # ========================================
@@ -627,6 +1949,29 @@ def send_message_to_ai(user_message, conversation_history, use_deep_research=Fal
     # Get provider from session state (user's selection in sidebar)
     provider = st.session_state.selected_api_provider
 
+    # ========================================
+    # Check for a remembered answer first
+    # ========================================
+    # A question already answered in the same conversation context gets
+    # the saved answer right away - no network call, no cost
+    # Deep Research answers are never reused: users turn it on to get
+    # a fresh, thorough look at their question
+    # (An empty question has nothing to tell answers apart, so skip it too)
+    cache_key = None
+    if not use_deep_research and normalize_question(user_message):
+        if provider == "openai":
+            model = st.session_state.selected_openai_model
+        else:
+            model = st.session_state.selected_hf_model
+        cache_key = make_response_cache_key(provider, model, user_message, conversation_history)
+
+        cached_answer = get_response_cache().get(cache_key)
+        if cached_answer is not None:
+            if stream:
+                # Keep streaming callers happy with a one-piece stream
+                return {"success": True, "response": iter([cached_answer])}
+            return {"success": True, "response": cached_answer}
+
     # ========================================
     # Route to the appropriate API function
     # ========================================
@@ -635,13 +1980,29 @@ def send_message_to_ai(user_message, conversation_history, use_deep_research=Fal
 
     if provider == "openai":
         # Use OpenAI ChatGPT
-        return send_message_to_openai(user_message, conversation_history, use_deep_research)
+        result = send_message_to_openai(user_message, conversation_history, use_deep_research, stream)
     else:
         # Use Hugging Face (fallback for free alternative)
-        return send_message_to_huggingface(user_message, conversation_history, use_deep_research)
+        result = send_message_to_huggingface(user_message, conversation_history, use_deep_research, stream)
+
+    # Remember successful answers to cacheable questions
+    if cache_key is not None and result["success"]:
+        if isinstance(result["response"], str):
+            get_response_cache().set(cache_key, result["response"])
+        else:
+            # Streams are saved once the last piece has arrived
+            result["response"] = stream_and_remember(result["response"], cache_key)
+
+    # Some Hugging Face models send the whole answer at once
+    # (only TGI-backed models can stream). To keep streaming callers happy,
+    # we wrap a finished answer as a one-piece stream
+    if stream and result["success"] and isinstance(result["response"], str):
+        result["response"] = iter([result["response"]])
 
+    return result
 
-def send_message_to_huggingface(user_message, conversation_history, use_deep_research=False):
+
+def send_message_to_huggingface(user_message, conversation_history, use_deep_research=False, stream=False):
     """
     Sends a message to Hugging Face API and gets a response.
 
@@ -655,10 +2016,18 @@ def send_message_to_huggingface(user_message, conversation_history, use_deep_res
     3. Uses more focused temperature (0.5 vs 0.7)
     4. Model selection is handled by session state (auto-switched by toggle)
 
+    NEW: TGI Server Support
+    If HF_TGI_URL is set in secrets.toml, we send the prompt to that
+    server instead of the public Inference API (see get_hf_tgi_url).
+    The server runs one fixed model, so the model dropdown is ignored.
+
     Parameters:
         user_message (string): What the user just asked
         conversation_history (list): Previous messages in this chat
         use_deep_research (boolean): If True, use Deep Research methodology (like Gemini/Claude)
+        stream (boolean): If True and the model can stream (our TGI server, or
+                          a TGI-backed model on the Inference API), "response"
+                          is a generator that yields the answer piece by piece
 
     Returns:
         dictionary: Contains "success" (True/False) and "response" (AI's answer or error message)
@@ -718,32 +2087,26 @@ def send_message_to_huggingface(user_message, conversation_history, use_deep_res
     # Hugging Face models don't have separate "system" messages
     # So we build everything into one prompt
 
-    # Get our Obsidian knowledge base
-    obsidian_context = get_all_examples_as_context()
-
-    # Choose methodology based on Deep Research mode
-    if use_deep_research:
-        # DEEP RESEARCH MODE: Use comprehensive analysis methodology
-        methodology_instructions = DEEP_RESEARCH_INSTRUCTIONS
-    else:
-        # NORMAL MODE: Use quick, concise responses
-        methodology_instructions = NORMAL_MODE_INSTRUCTIONS
-
-    # Build the full prompt for the AI
-    # Format: Methodology + Knowledge Base + Conversation + New Question
-    full_prompt = f"""{methodology_instructions}
-
-=== OBSIDIAN KNOWLEDGE BASE ===
-{obsidian_context}
-
-=== CONVERSATION ===
-
-"""
+    # Format: Knowledge Base + Methodology + Conversation + New Question
+    # We collect the prompt in pieces (a list) and glue them together
+    # ONCE at the end with "".join(). Adding to a string with += copies
+    # the whole (multi-KB) prompt again for every single message
+    #
+    # Unlike OpenAI, Hugging Face gets the WHOLE prompt uploaded and read
+    # again with every message, so we only send the knowledge base
+    # examples that match this question (see get_relevant_context)
+    # The methodology part is built once per mode and reused
+    prompt_parts = [
+        "=== OBSIDIAN KNOWLEDGE BASE ===\n",
+        get_relevant_context(user_message),
+        "\n\n",
+        build_hf_instructions(use_deep_research),
+    ]
 
     # Add recent conversation history for context
-    # We only include the last few messages (MAX_CONTEXT_MESSAGES)
+    # We only include the newest messages that fit in MAX_CONTEXT_TOKENS
     # Why? Too much context confuses the AI and costs more
-    recent_messages = conversation_history[-MAX_CONTEXT_MESSAGES:]
+    recent_messages = trim_history_to_token_budget(conversation_history)
 
     # Loop through recent messages and add them to prompt
     for message in recent_messages:
@@ -752,13 +2115,15 @@ def send_message_to_huggingface(user_message, conversation_history, use_deep_res
 
         # Format nicely for the AI
         if role == "user":
-            full_prompt += f"User: {content}\n"
+            prompt_parts.append(f"User: {content}\n")
         else:
-            full_prompt += f"Assistant: {content}\n"
+            prompt_parts.append(f"Assistant: {content}\n")
 
     # Add the new user message
-    full_prompt += f"User: {user_message}\n"
-    full_prompt += "Assistant: "
+    prompt_parts.append(f"User: {user_message}\n")
+    prompt_parts.append("Assistant: ")
+
+    full_prompt = "".join(prompt_parts)
 
     # ========================================
     # Configure API Parameters for Deep Research
@@ -788,22 +2153,47 @@ def send_message_to_huggingface(user_message, conversation_history, use_deep_res
     # Try to send the request to the AI
     # We use try/except because network calls can fail
     try:
+        # Prefer our own TGI server when one is configured
+        tgi_url = get_hf_tgi_url()
+        if tgi_url:
+            return send_prompt_to_tgi(tgi_url, headers, full_prompt, max_length, temperature, stream)
+
+        # Ask for a streamed answer when the caller wants one
+        # Models that Hugging Face runs on TGI will then send the answer
+        # piece by piece; other models ignore this and answer all at once
+        if stream:
+            payload["stream"] = True
+
         # Send POST request to Hugging Face API
         # POST means "I'm sending you data"
+        # We use the shared session so the connection is reused
         # timeout means "give up after this many seconds"
-        response = requests.post(
+        # We encode the payload ourselves (data=...) so the fast JSON
+        # library does the work; headers already say it's JSON
+        # stream=True tells requests not to wait for the whole body
+        response = get_http_session().post(
             api_url,
             headers=headers,
-            json=payload,
-            timeout=API_TIMEOUT
+            data=encode_json(payload),
+            timeout=API_TIMEOUT,
+            stream=stream
         )
 
         # Check if request was successful
         # Status code 200 means "OK, everything worked"
         if response.status_code == 200:
+            # Did the server stream the answer? It tells us in the headers
+            # (same "server-sent events" format as our own TGI server)
+            if response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                return {
+                    "success": True,
+                    "response": stream_tgi_text(response)
+                }
+
             # Parse the JSON response
             # The AI sends back JSON formatted data
-            response_data = response.json()
+            # We parse the raw bytes directly (no text decoding step)
+            response_data = decode_json(response.content)
 
             # Extract the AI's actual text response
             # The structure is: [{"generated_text": "the response"}]
@@ -822,6 +2212,9 @@ def send_message_to_huggingface(user_message, conversation_history, use_deep_res
 
         # If status code is not 200, something went wrong
         else:
+            # We won't read the body, so give the connection back
+            response.close()
+
             # Return error with status code
             return {
                 "success": False,
@@ -836,14 +2229,27 @@ def send_message_to_huggingface(user_message, conversation_history, use_deep_res
             "response": f"❌ Request timed out after {API_TIMEOUT} seconds. The AI service might be overloaded. Please try again."
         }
 
-    # Catch any other errors
-    # This is a safety net for unexpected problems
+    # Catch connection problems (no internet, server refused, ...)
+    # RequestException is the parent of every error "requests" raises
+    except requests.exceptions.RequestException as error:
+        return {
+            "success": False,
+            "response": f"❌ Could not reach the AI service: {error}"
+        }
+
+    # The answer arrived but didn't look like we expected
+    # ValueError: not valid JSON, KeyError/IndexError/TypeError: wrong shape
+    except (ValueError, KeyError, IndexError, TypeError) as error:
+        return {
+            "success": False,
+            "response": f"❌ Unexpected response from the AI service: {error}"
+        }
+
+    # Anything else - still answer with an error message instead of crashing
     except Exception as error:
-        # Convert error to string for display
-        error_message = str(error)
         return {
             "success": False,
-            "response": f"❌ Unexpected error: {error_message}"
+            "response": f"❌ Unexpected error: {error}"
         }
 
 
@@ -856,15 +2262,20 @@ def send_message_to_huggingface(user_message, conversation_history, use_deep_res
 
 def render_sidebar():
     """
-    Creates the sidebar with project management controls.
+    Creates the sidebar with AI settings and project management controls.
 
     The sidebar is the panel on the left side of the screen.
     It contains:
+    - AI provider and model selection
     - List of all projects
     - Button to create new project
     - Button to delete current project
     - Research mode toggle
 
+    Each part is a "fragment" (see render_ai_configuration): clicking
+    inside it only redraws that part of the sidebar, not the whole page
+    with the entire chat history.
+
     Parameters: None
     Returns: None (just draws the sidebar)
 
@@ -872,163 +2283,203 @@ def render_sidebar():
         render_sidebar()  # Creates sidebar on the left
     """
 
-    # Get the project manager from session state
-    # This is where all our projects are stored
-    manager = st.session_state.project_manager
+    # Show the notification a sidebar action left for us before it reran
+    # st.toast pops up in the corner and disappears by itself - nobody
+    # has to wait for it
+    if st.session_state.pending_toast is not None:
+        st.toast(st.session_state.pending_toast, icon="✅")
+        st.session_state.pending_toast = None
 
     # Start the sidebar
     # Everything inside this "with" block appears in the sidebar
+    # (Fragments can't open the sidebar themselves, so we call them in here)
     with st.sidebar:
-        # ========================================
-        # NEW SECTION: AI Configuration
-        # ========================================
-        # This section lets users choose which AI service and model to use
-        # It's at the top because it affects how the whole app works
+        render_ai_configuration()
 
-        st.header("🤖 AI Configuration")
+        # Add a divider to separate AI config from project management
+        st.divider()
 
-        # Add explanatory text about what this section does
-        st.markdown("Choose which AI service and model to use for responses.")
+        render_project_controls()
 
-        # ----------------------------------------
-        # API Provider Selector
-        # ----------------------------------------
-        # This dropdown lets users choose between OpenAI and Hugging Face
-        #
-        # WHY TWO OPTIONS?
-        # - OpenAI: Paid service, high quality, fast, requires API key
-        # - Hugging Face: Free service, decent quality, sometimes slower
-        #
-        # st.selectbox creates a dropdown menu
-        # The user clicks it and selects one option
 
-        # Define the available provider options
-        # This list determines what appears in the dropdown
-        provider_options = ["OpenAI", "Hugging Face"]
+@st.fragment
+def render_ai_configuration():
+    """
+    Draws the AI provider and model selectors (a sidebar fragment).
 
-        # Find which option matches the current session state
-        # We need to convert "openai" -> "OpenAI" for display
-        if st.session_state.selected_api_provider == "openai":
-            current_provider_index = 0  # OpenAI is first in list
-        else:
-            current_provider_index = 1  # Hugging Face is second in list
-
-        # Create the dropdown selector
-        selected_provider = st.selectbox(
-            "API Provider:",  # Label shown above dropdown
-            options=provider_options,  # List of choices
-            index=current_provider_index,  # Which one is selected by default
-            help="OpenAI requires a paid API key. Hugging Face is free but may be slower."  # Tooltip on hover
+    @st.fragment makes this function its own little app: when the user
+    changes a dropdown here, Streamlit re-runs ONLY this function instead
+    of the whole script - so a long chat history isn't redrawn just
+    because someone picked another model.
+
+    Parameters: None
+    Returns: None (just draws the selectors)
+
+    Example usage:
+        with st.sidebar:
+            render_ai_configuration()
+    """
+
+    # Remember the settings before this run, to see if they change
+    # (the Deep Research banner in the chat area shows the model name)
+    settings_before = (
+        st.session_state.selected_api_provider,
+        st.session_state.selected_openai_model,
+        st.session_state.selected_hf_model,
+    )
+
+    # ========================================
+    # NEW SECTION: AI Configuration
+    # ========================================
+    # This section lets users choose which AI service and model to use
+    # It's at the top because it affects how the whole app works
+
+    st.header("🤖 AI Configuration")
+
+    # Add explanatory text about what this section does
+    st.markdown("Choose which AI service and model to use for responses.")
+
+    # ----------------------------------------
+    # API Provider Selector
+    # ----------------------------------------
+    # This dropdown lets users choose between OpenAI and Hugging Face
+    #
+    # WHY TWO OPTIONS?
+    # - OpenAI: Paid service, high quality, fast, requires API key
+    # - Hugging Face: Free service, decent quality, sometimes slower
+    #
+    # st.selectbox creates a dropdown menu
+    # The user clicks it and selects one option
+
+    # Create the dropdown selector
+    # key="selected_api_provider" connects the dropdown DIRECTLY to
+    # st.session_state.selected_api_provider: it starts on whatever is
+    # stored there, and picking an option stores the new choice -
+    # no index to look up and nothing to write back afterwards
+    # The options are the internal names ("openai"); format_func turns
+    # each one into the name we show ("OpenAI")
+    st.selectbox(
+        "API Provider:",  # Label shown above dropdown
+        options=list(PROVIDER_LABELS),  # List of choices
+        format_func=PROVIDER_LABELS.get,  # How each choice is displayed
+        key="selected_api_provider",  # Read and write this session state value
+        help="OpenAI requires a paid API key. Hugging Face is free but may be slower."  # Tooltip on hover
+    )
+
+    # ----------------------------------------
+    # Model Selector (Changes Based on Provider)
+    # ----------------------------------------
+    # Show different models depending on which provider is selected
+    #
+    # WHY DIFFERENT MODELS?
+    # Each AI service has multiple models with different capabilities:
+    # - Faster models: Quick responses, good for simple questions
+    # - Advanced models: Slower but better quality, good for complex questions
+
+    # Note: the model dropdowns still pass index= instead of key=, because
+    # the Deep Research toggle (drawn further down, in the same run)
+    # changes the selected model, and Streamlit doesn't allow changing a
+    # widget's key value once that widget has been drawn
+
+    # Check which provider is currently selected
+    if st.session_state.selected_api_provider == "openai":
+        # -------- OpenAI Model Selector --------
+
+        # The available models are defined once at the top of the file
+        # (OPENAI_MODEL_CHOICES)
+
+        # Find which model is currently selected
+        # (default to the first option if it's not in the list)
+        current_model_index = OPENAI_MODEL_POSITIONS.get(st.session_state.selected_openai_model, 0)
+
+        # Create the model selector dropdown
+        selected_model_name = st.selectbox(
+            "OpenAI Model:",  # Label
+            options=OPENAI_MODEL_NAMES,  # List of model display names
+            index=current_model_index,  # Currently selected model
+            help="GPT-3.5 is fast and cheap. GPT-4 is slower but gives better answers."  # Tooltip
         )
 
-        # Update session state when user changes selection
-        # Convert display name back to lowercase for internal use
-        if selected_provider == "OpenAI":
-            st.session_state.selected_api_provider = "openai"
-        else:
-            st.session_state.selected_api_provider = "huggingface"
+        # Update session state with selected model ID (only if it changed)
+        new_model = OPENAI_MODEL_CHOICES[selected_model_name]
+        if new_model != st.session_state.selected_openai_model:
+            st.session_state.selected_openai_model = new_model
 
-        # ----------------------------------------
-        # Model Selector (Changes Based on Provider)
-        # ----------------------------------------
-        # Show different models depending on which provider is selected
-        #
-        # WHY DIFFERENT MODELS?
-        # Each AI service has multiple models with different capabilities:
-        # - Faster models: Quick responses, good for simple questions
-        # - Advanced models: Slower but better quality, good for complex questions
-
-        # Check which provider is currently selected
-        if st.session_state.selected_api_provider == "openai":
-            # -------- OpenAI Model Selector --------
-
-            # Define available OpenAI models
-            # Format: Display Name -> Internal Model ID
-            openai_models = {
-                "GPT-3.5 Turbo (Fast & Affordable)": "gpt-3.5-turbo",
-                "GPT-4o Mini (Better Quality)": "gpt-4o-mini",
-                "GPT-4 (Most Powerful)": "gpt-4"
-            }
+    else:
+        # -------- Hugging Face Model Selector --------
 
-            # Get list of display names
-            openai_model_names = list(openai_models.keys())
-
-            # Find which model is currently selected
-            # We need to find the display name for the current model ID
-            current_model_id = st.session_state.selected_openai_model
-            current_model_index = 0  # Default to first option
-
-            # Loop through to find matching index
-            for i, display_name in enumerate(openai_model_names):
-                if openai_models[display_name] == current_model_id:
-                    current_model_index = i
-                    break
-
-            # Create the model selector dropdown
-            selected_model_name = st.selectbox(
-                "OpenAI Model:",  # Label
-                options=openai_model_names,  # List of model display names
-                index=current_model_index,  # Currently selected model
-                help="GPT-3.5 is fast and cheap. GPT-4 is slower but gives better answers."  # Tooltip
-            )
+        # The available models are defined once at the top of the file
+        # (HF_MODEL_CHOICES)
 
-            # Update session state with selected model ID
-            st.session_state.selected_openai_model = openai_models[selected_model_name]
+        # Find which model is currently selected
+        # (default to the first option if it's not in the list)
+        current_model_index = HF_MODEL_POSITIONS.get(st.session_state.selected_hf_model, 0)
 
-        else:
-            # -------- Hugging Face Model Selector --------
-
-            # Define available Hugging Face models
-            # Format: Display Name -> Model URL/ID
-            hf_models = {
-                "DialoGPT Medium (Conversational)": "microsoft/DialoGPT-medium",
-                "GPT-2 (Classic)": "gpt2",
-                "Llama 2 Chat (Advanced)": "meta-llama/Llama-2-7b-chat-hf"
-            }
+        # Create the model selector dropdown
+        selected_model_name = st.selectbox(
+            "Hugging Face Model:",  # Label
+            options=HF_MODEL_NAMES,  # List of model display names
+            index=current_model_index,  # Currently selected model
+            help="DialoGPT is good for conversation. Llama 2 is more advanced but slower."  # Tooltip
+        )
 
-            # Get list of display names
-            hf_model_names = list(hf_models.keys())
-
-            # Find which model is currently selected
-            current_model_id = st.session_state.selected_hf_model
-            current_model_index = 0  # Default to first option
-
-            # Loop through to find matching index
-            for i, display_name in enumerate(hf_model_names):
-                if hf_models[display_name] == current_model_id:
-                    current_model_index = i
-                    break
-
-            # Create the model selector dropdown
-            selected_model_name = st.selectbox(
-                "Hugging Face Model:",  # Label
-                options=hf_model_names,  # List of model display names
-                index=current_model_index,  # Currently selected model
-                help="DialoGPT is good for conversation. Llama 2 is more advanced but slower."  # Tooltip
-            )
+        # Update session state with selected model ID (only if it changed)
+        new_model = HF_MODEL_CHOICES[selected_model_name]
+        if new_model != st.session_state.selected_hf_model:
+            st.session_state.selected_hf_model = new_model
+
+    # The chat area only shows the model while Deep Research is on -
+    # then (and only then) a change needs the whole page to redraw
+    settings_after = (
+        st.session_state.selected_api_provider,
+        st.session_state.selected_openai_model,
+        st.session_state.selected_hf_model,
+    )
+    current_project = st.session_state.project_manager.get_current_project()
+    if settings_after != settings_before and current_project and current_project.deep_research_mode:
+        st.rerun()
 
-            # Update session state with selected model ID
-            st.session_state.selected_hf_model = hf_models[selected_model_name]
 
-        # Add a divider to separate AI config from project management
-        st.divider()
+@st.fragment
+def render_project_controls():
+    """
+    Draws the project list and project actions (a sidebar fragment).
 
-        # ========================================
-        # END OF NEW SECTION
-        # ========================================
+    Like render_ai_configuration, this is a fragment: typing a new project
+    name or creating a project only redraws this part of the sidebar.
+    Actions that change what the chat area shows (switching, clearing or
+    deleting a project, Deep Research on/off) call st.rerun(), which
+    redraws the whole page.
 
-        # Add a header
-        st.header("📁 Projects")
+    Parameters: None
+    Returns: None (just draws the project controls)
 
-        # Add some explanatory text
-        st.markdown("Create separate projects for different topics or learning goals.")
+    Example usage:
+        with st.sidebar:
+            render_project_controls()
+    """
 
-        # Add a divider line
-        st.divider()
+    # Get the project manager from session state
+    # This is where all our projects are stored
+    manager = st.session_state.project_manager
 
-        # Section for creating new project
-        st.subheader("Create New Project")
+    # Add a header
+    st.header("📁 Projects")
 
+    # Add some explanatory text
+    st.markdown("Create separate projects for different topics or learning goals.")
+
+    # Add a divider line
+    st.divider()
+
+    # Section for creating new project
+    st.subheader("Create New Project")
+
+    # A form groups the name box and the button together:
+    # typing in the box doesn't rerun anything - only clicking
+    # "Create Project" sends the name (one rerun instead of several)
+    # clear_on_submit=True empties the box again afterwards
+    with st.form("new_project_form", clear_on_submit=True, border=False):
         # Text input for project name
         # The user types a name here
         new_project_name = st.text_input(
@@ -1038,160 +2489,293 @@ def render_sidebar():
         )
 
         # Button to create the project
-        # st.button returns True when clicked
-        if st.button("➕ Create Project", use_container_width=True):
-            # Check if user entered a name
-            if new_project_name and new_project_name.strip() != "":
-                # Try to create the project
-                success = manager.create_project(new_project_name.strip())
-
-                if success:
-                    # Show success message
-                    # st.success shows a green success box
-                    st.success(f"✓ Created project: {new_project_name}")
-                    # Rerun the app to refresh the project list
-                    # st.rerun() restarts the script from the top
-                    time.sleep(0.5)  # Brief pause so user sees success message
-                    st.rerun()
-                else:
-                    # Project name already exists
-                    # st.error shows a red error box
-                    st.error("❌ A project with this name already exists")
+        # st.form_submit_button returns True when clicked
+        create_clicked = st.form_submit_button("➕ Create Project", use_container_width=True)
+
+    # Handle the click outside the form, so the messages appear below it
+    if create_clicked:
+        # Check if user entered a name
+        if new_project_name and new_project_name.strip() != "":
+            # Try to create the project
+            success = manager.create_project(new_project_name.strip())
+
+            if success:
+                # Show success message
+                # st.success shows a green success box
+                st.success(f"✓ Created project: {new_project_name}")
+                # No rerun needed: the project list below is drawn after
+                # this, in the same run, so it already includes the new one
             else:
-                # User didn't enter a name
-                st.warning("⚠️ Please enter a project name")
+                # Project name already exists
+                # st.error shows a red error box
+                st.error("❌ A project with this name already exists")
+        else:
+            # User didn't enter a name
+            st.warning("⚠️ Please enter a project name")
 
-        st.divider()
+    st.divider()
 
-        # Section for switching between projects
-        st.subheader("Your Projects")
-
-        # Get list of all project names
-        all_project_names = manager.get_all_project_names()
-
-        # Get current project name
-        current_project_name = manager.current_project_name
-
-        # Check if any projects exist
-        if len(all_project_names) > 0:
-            # Loop through each project and create a button
-            for project_name in all_project_names:
-                # Check if this is the current project
-                is_current = (project_name == current_project_name)
-
-                # Create a button for this project
-                # If it's current, show with a ► symbol
-                if is_current:
-                    button_label = f"► {project_name}"
-                else:
-                    button_label = f"   {project_name}"
-
-                # Create the button
-                # type="primary" makes current project blue
-                button_type = "primary" if is_current else "secondary"
-
-                if st.button(
-                    button_label,
-                    key=f"project_btn_{project_name}",  # Unique key for each button
-                    use_container_width=True,
-                    type=button_type
-                ):
-                    # User clicked this project button
-                    # Switch to this project
-                    manager.switch_to_project(project_name)
-                    # Rerun to refresh the display
-                    st.rerun()
+    # Section for switching between projects
+    st.subheader("Your Projects")
 
-        else:
-            # No projects exist (shouldn't happen due to default project)
-            st.info("No projects yet. Create one above!")
+    # Get list of all project names
+    all_project_names = manager.get_all_project_names()
 
-        st.divider()
+    # Get the current project ONCE and reuse it for the rest of the sidebar
+    # (after "Create Project" above, which can change it when it's the first)
+    current_project = manager.get_current_project()
+    if current_project:
+        current_project_name = current_project.name
+    else:
+        current_project_name = None
+
+    # Check if any projects exist
+    if len(all_project_names) > 0:
+        # One radio list for all projects (instead of one button each):
+        # Streamlit sends a single widget to the browser, however many
+        # projects there are. The current project is pre-selected.
+        chosen_project_name = st.radio(
+            "Your Projects",
+            options=all_project_names,
+            index=all_project_names.index(current_project_name),
+            label_visibility="collapsed"  # The subheader above is the label
+        )
+
+        # User picked a different project - switch to it
+        if chosen_project_name != current_project_name:
+            manager.switch_to_project(chosen_project_name)
+            # Rerun to refresh the display
+            st.rerun()
+
+    else:
+        # No projects exist (shouldn't happen due to default project)
+        st.info("No projects yet. Create one above!")
+
+    st.divider()
+
+    # Section for project actions
+    st.subheader("Project Actions")
 
-        # Section for project actions
-        st.subheader("Project Actions")
+    # (current_project was looked up above, with the project list)
+    if current_project:
+        # Show project info
+        st.markdown(f"**Current:** {current_project.name}")
+        st.markdown(f"**Messages:** {current_project.message_count}")
 
-        # Get current project
-        current_project = manager.get_current_project()
+        # ========================================
+        # Deep Research Mode Toggle
+        # ========================================
+        # This is like Gemini or Claude's "Deep Research" feature
+        #
+        # WHAT IT DOES:
+        # 1. Automatically uses the STRONGEST model available
+        # 2. Applies special methodology:
+        #    - Step-by-step reasoning
+        #    - Multiple perspectives
+        #    - More thorough analysis
+        #    - Longer, more detailed responses
+        #
+        # WHY TWO APPROACHES?
+        # - Normal mode: Quick answers, good for simple questions
+        # - Deep Research: Comprehensive analysis, good for complex topics
+
+        # Create the toggle switch
+        research_mode = st.toggle(
+            "🔬 Deep Research Mode",
+            value=current_project.deep_research_mode,  # Current state
+            help="Uses the strongest AI model and deep analysis methodology for comprehensive, step-by-step responses"
+        )
 
-        if current_project:
-            # Show project info
-            st.markdown(f"**Current:** {current_project.name}")
-            st.markdown(f"**Messages:** {current_project.message_count}")
+        # If toggle state changed, update the project
+        if research_mode != current_project.deep_research_mode:
+            current_project.toggle_research_mode()
 
             # ========================================
-            # Deep Research Mode Toggle
+            # AUTO-SELECT STRONGEST MODEL
             # ========================================
-            # This is like Gemini or Claude's "Deep Research" feature
-            #
-            # WHAT IT DOES:
-            # 1. Automatically uses the STRONGEST model available
-            # 2. Applies special methodology:
-            #    - Step-by-step reasoning
-            #    - Multiple perspectives
-            #    - More thorough analysis
-            #    - Longer, more detailed responses
-            #
-            # WHY TWO APPROACHES?
-            # - Normal mode: Quick answers, good for simple questions
-            # - Deep Research: Comprehensive analysis, good for complex topics
-
-            # Create the toggle switch
-            research_mode = st.toggle(
-                "🔬 Deep Research Mode",
-                value=current_project.deep_research_mode,  # Current state
-                help="Uses the strongest AI model and deep analysis methodology for comprehensive, step-by-step responses"
-            )
-
-            # If toggle state changed, update the project
-            if research_mode != current_project.deep_research_mode:
-                current_project.toggle_research_mode()
-
-                # ========================================
-                # AUTO-SELECT STRONGEST MODEL
-                # ========================================
-                # When Deep Research is enabled, automatically switch to the best model
-
-                if research_mode:
-                    # Deep Research is now ON - use strongest model
-                    if st.session_state.selected_api_provider == "openai":
-                        # For OpenAI: GPT-4 is the strongest
-                        st.session_state.selected_openai_model = "gpt-4"
-                    else:
-                        # For Hugging Face: Llama 2 Chat is the most advanced
-                        st.session_state.selected_hf_model = "meta-llama/Llama-2-7b-chat-hf"
-                else:
-                    # Deep Research is now OFF - switch to fast/affordable model
-                    if st.session_state.selected_api_provider == "openai":
-                        # For OpenAI: GPT-3.5 Turbo is fast and cheap
-                        st.session_state.selected_openai_model = "gpt-3.5-turbo"
-                    else:
-                        # For Hugging Face: DialoGPT is good and fast
-                        st.session_state.selected_hf_model = "microsoft/DialoGPT-medium"
+            # When Deep Research is enabled, automatically switch to the best model
 
+            # ON: strongest model (GPT-4 / Llama 2 Chat)
+            # OFF: fast/affordable model (GPT-3.5 Turbo / DialoGPT)
+            provider = st.session_state.selected_api_provider
+            if provider == "openai":
+                st.session_state.selected_openai_model = pick_model(provider, research_mode)
+            else:
+                st.session_state.selected_hf_model = pick_model(provider, research_mode)
+
+            st.rerun()
+
+        # Button to clear conversation
+        if st.button("🗑️ Clear Conversation", use_container_width=True):
+            current_project.clear_messages()
+            # Shown as a toast after the rerun (see render_sidebar)
+            st.session_state.pending_toast = "Conversation cleared"
+            st.rerun()
+
+        # Button to delete project
+        # Only show if more than one project exists
+        if len(all_project_names) > 1:
+            if st.button("❌ Delete Project", use_container_width=True, type="secondary"):
+                # Delete current project
+                manager.delete_project(current_project.name)
+                # Shown as a toast after the rerun (see render_sidebar)
+                st.session_state.pending_toast = f"Deleted project: {current_project.name}"
                 st.rerun()
+        else:
+            # Can't delete the only project
+            st.info("Create another project before deleting this one")
 
-            # Button to clear conversation
-            if st.button("🗑️ Clear Conversation", use_container_width=True):
-                current_project.clear_messages()
-                st.success("✓ Conversation cleared")
-                time.sleep(0.5)
-                st.rerun()
 
-            # Button to delete project
-            # Only show if more than one project exists
-            if len(all_project_names) > 1:
-                if st.button("❌ Delete Project", use_container_width=True, type="secondary"):
-                    # Delete current project
-                    manager.delete_project(current_project.name)
-                    st.success(f"✓ Deleted project: {current_project.name}")
-                    time.sleep(0.5)
-                    st.rerun()
-            else:
-                # Can't delete the only project
-                st.info("Create another project before deleting this one")
+@st.cache_resource(show_spinner=False)
+def get_deep_research_banner(model_name):
+    """
+    Builds the "Deep Research Mode is ACTIVE" text ONCE per model.
+
+    The banner is shown on every rerun while Deep Research is on, but it
+    only changes when the user picks another model. st.cache_resource
+    remembers the finished text for each model name (a string can't be
+    changed, so sharing the same one is safe).
+
+    Parameters:
+        model_name (string): The model ID (e.g. "gpt-4" or
+                             "meta-llama/Llama-2-7b-chat-hf")
+
+    Returns:
+        string: The banner text (markdown)
+
+    Example usage:
+        st.info(get_deep_research_banner("gpt-4"))
+    """
+
+    # Hugging Face IDs look like "owner/model" - show just the model part
+    # rpartition("/") splits at the LAST "/" into (before, "/", after);
+    # "after" is empty when there's no "/" at all, so we keep the full ID
+    short_name = model_name.rpartition("/")[2] or model_name
+
+    return DEEP_RESEARCH_BANNER_TEMPLATE.format(model_name=short_name)
+
+
+def close_open_code_fence(text):
+    """
+    Adds a closing ``` (or ~~~) if a message leaves a code block open.
+
+    AI answers are sometimes cut off in the middle of a code block. On its
+    own that's harmless, but format_history_markdown joins many messages
+    into one text - and an open code block would swallow every message
+    after it.
+
+    Parameters:
+        text (string): One message's markdown
+
+    Returns:
+        string: The same text, with a closing fence added if one was missing
+
+    Example usage:
+        close_open_code_fence("```dataview\nTABLE file.name")
+        # Returns: "```dataview\nTABLE file.name\n```"
+    """
+
+    # The fence that opened the current code block (None = not in one)
+    open_fence = None
+
+    for line in text.splitlines():
+        stripped = line.strip()
+
+        # A fence is a line starting with 3 or more ` or ~ characters
+        fence_char = stripped[:1]
+        if fence_char not in ("`", "~"):
+            continue
+        fence = stripped[:len(stripped) - len(stripped.lstrip(fence_char))]
+        if len(fence) < 3:
+            continue
+
+        if open_fence is None:
+            # Opens a code block (the rest of the line is the language)
+            open_fence = fence
+        elif fence_char == open_fence[0] and len(fence) >= len(open_fence) and stripped == fence:
+            # Closes it: same character, at least as long, nothing after it
+            open_fence = None
+
+    if open_fence is None:
+        return text
+
+    return f"{text}\n{open_fence}"
+
+
+def format_history_markdown(messages):
+    """
+    Turns a list of chat messages into ONE markdown text.
+
+    Drawing each message in its own chat bubble means two elements per
+    message for Streamlit to send and for the browser to draw. For older
+    messages (which don't change any more) we show them as one block of
+    text instead, with a label and a line between messages.
+
+    Each message's unclosed code block (if any) is closed first, so one
+    cut-off answer can't turn the rest of the history into code.
+
+    Parameters:
+        messages (list): Messages with "role" and "content"
+
+    Returns:
+        string: Markdown text with every message
+
+    Example usage:
+        st.markdown(format_history_markdown(messages[:-1]))
+    """
+
+    return "\n\n---\n\n".join(
+        f"**{CHAT_ROLE_LABELS.get(message['role'], message['role'])}:**\n\n{close_open_code_fence(message['content'])}"
+        for message in messages
+    )
+
+
+def show_earlier_messages(project_name):
+    """
+    Shows one more page of older messages for a project.
+
+    Used as the "on_click" callback of the "Load earlier messages" button.
+
+    Parameters:
+        project_name (string): The project whose chat history to extend
+
+    Returns:
+        None
+
+    Example usage:
+        st.button("Load earlier", on_click=show_earlier_messages, args=("My Project",))
+    """
+
+    pages_shown = st.session_state.history_pages_shown.get(project_name, 1)
+    st.session_state.history_pages_shown[project_name] = pages_shown + 1
+
+
+def remember_user_message():
+    """
+    Saves the message the user just sent, for the chat to answer.
+
+    The chat box (st.chat_input) is drawn in main(), outside the chat
+    fragment - Streamlit only pins it to the bottom of the page when it
+    isn't inside a container or fragment. This callback hands the message
+    over to render_chat_interface through session state.
+
+    Using session state (instead of passing the message as a parameter)
+    matters: when the fragment re-runs on its own (e.g. "Load earlier
+    messages"), Streamlit calls it again with the SAME parameters, which
+    would send the old message a second time. Here the chat takes the
+    message out of session state, so it's answered exactly once.
 
+    Parameters: None
+    Returns: None
+
+    Example usage:
+        st.chat_input("Ask...", key="chat_input", on_submit=remember_user_message)
+    """
+
+    st.session_state.pending_user_message = st.session_state.chat_input
 
+
+@st.fragment
 def render_chat_interface():
     """
     Creates the main chat interface where conversation happens.
@@ -1201,6 +2785,14 @@ def render_chat_interface():
     - User types new messages
     - AI responses appear
 
+    Like the sidebar sections, this is a "fragment": loading earlier
+    messages only re-runs this function, not the sidebar. The chat box
+    itself lives in main() (so it stays pinned to the bottom of the page),
+    which means sending a message re-runs the whole app.
+    Sidebar actions that change the chat (switching, clearing or deleting
+    a project, Deep Research on/off) re-run the whole app, which redraws
+    this fragment too.
+
     Parameters: None
     Returns: None (just draws the interface)
 
@@ -1230,32 +2822,16 @@ def render_chat_interface():
     if current_project.deep_research_mode:
         # Get current provider and model to show in indicator
         current_provider = st.session_state.selected_api_provider
-        current_model = ""
 
         if current_provider == "openai":
             current_model = st.session_state.selected_openai_model
         else:
-            # For Hugging Face, show short model name
-            hf_model = st.session_state.selected_hf_model
-            # Extract just the model name from the full path
-            if "/" in hf_model:
-                current_model = hf_model.split("/")[-1]
-            else:
-                current_model = hf_model
+            current_model = st.session_state.selected_hf_model
 
         # Display the indicator with details
-        st.info(f"""
-        🔬 **Deep Research Mode is ACTIVE**
-
-        **What this means:**
-        - Using the strongest model: `{current_model}`
-        - Step-by-step analysis methodology
-        - Multiple perspectives considered
-        - More thorough and detailed responses
-        - Longer response length allowed
-
-        *Like Gemini or Claude's deep research feature*
-        """)
+        # (the text - including the short model name - is built once
+        # per model, see get_deep_research_banner)
+        st.info(get_deep_research_banner(current_model))
 
     st.divider()
 
@@ -1265,8 +2841,27 @@ def render_chat_interface():
 
     # Display all messages in the conversation
     with chat_container:
-        # Get all messages from current project
-        messages = current_project.get_messages()
+        # How many pages has the user loaded for this project? (default: 1)
+        pages_shown = st.session_state.history_pages_shown.get(
+            current_project.name, 1
+        )
+
+        # Get only the newest messages instead of the whole history
+        # older_cursor is None when there's nothing older left to load
+        messages, older_cursor = current_project.get_messages_page(
+            limit=pages_shown * CHAT_PAGE_SIZE
+        )
+
+        # Offer to load older messages if some are hidden
+        if older_cursor is not None:
+            # older_cursor = how many messages are still hidden above
+            # on_click runs show_earlier_messages BEFORE the chat redraws,
+            # so the extra page appears right away (no second rerun needed)
+            st.button(
+                f"⬆️ Load earlier messages ({older_cursor} more)",
+                on_click=show_earlier_messages,
+                args=(current_project.name,)
+            )
 
         # If no messages yet, show welcome message
         if len(messages) == 0:
@@ -1280,37 +2875,39 @@ def render_chat_interface():
             - "What's the best way to organize my vault?"
             """)
         else:
-            # Loop through messages and display each one
-            for message in messages:
-                role = message["role"]
-                content = message["content"]
-
-                # Display based on role
-                if role == "user":
-                    # User messages: show with chat_message
-                    # "user" avatar shows a person icon
-                    with st.chat_message("user"):
-                        st.markdown(content)
-                else:
-                    # Assistant messages: show with chat_message
-                    # "assistant" avatar shows a robot icon
-                    with st.chat_message("assistant"):
-                        st.markdown(content)
+            # Every element costs the browser work to draw, so all the
+            # OLDER messages go into ONE markdown block (2 elements instead
+            # of 2 per message) - see format_history_markdown
+            older_messages = messages[:-1]
+            if older_messages:
+                st.markdown(format_history_markdown(older_messages))
+
+            # The latest message keeps its chat bubble
+            # "user" avatar shows a person icon, "assistant" a robot icon
+            latest_message = messages[-1]
+            with st.chat_message(latest_message["role"]):
+                st.markdown(latest_message["content"])
 
     # Add divider before input
     st.divider()
 
-    # Create input area for new messages
-    # st.chat_input creates a text box at the bottom
-    user_input = st.chat_input(
-        "Ask me anything about Obsidian...",
-        key="chat_input"
-    )
+    # Take the message typed in the chat box (drawn in main()), if any
+    # Setting it back to None means it's only answered once
+    user_input = st.session_state.pending_user_message
+    st.session_state.pending_user_message = None
 
     # If user submitted a message (pressed Enter or clicked send)
     if user_input:
         # User typed something!
 
+        # Get conversation history (the messages BEFORE this question)
+        # We grab it before saving the new message, because the
+        # send_message functions add the new question themselves -
+        # otherwise the AI would see it twice
+        # Only the newest MAX_HISTORY_MESSAGES are copied - the full
+        # history stays in the project for the chat display
+        conversation_history, _ = current_project.get_messages_page(limit=MAX_HISTORY_MESSAGES)
+
         # Add user message to project
         current_project.add_message("user", user_input)
 
@@ -1326,23 +2923,21 @@ def render_chat_interface():
             # Show loading message
             message_placeholder.markdown("🤔 Thinking...")
 
-            # Get conversation history
-            conversation_history = current_project.get_messages()
-
             # Send message to AI
+            # stream=True means the answer arrives piece by piece
             result = send_message_to_ai(
                 user_input,
                 conversation_history,
-                use_deep_research=current_project.deep_research_mode
+                use_deep_research=current_project.deep_research_mode,
+                stream=True
             )
 
             # Check if successful
             if result["success"]:
-                # Got a response! Display it
-                ai_response = result["response"]
-
-                # Update placeholder with actual response
-                message_placeholder.markdown(ai_response)
+                # Got a response! Show it as it arrives
+                # write_stream() replaces "Thinking..." with the text, updating
+                # it with every new piece, and returns the complete answer
+                ai_response = message_placeholder.write_stream(result["response"])
 
                 # Add to project history
                 current_project.add_message("assistant", ai_response)
@@ -1358,6 +2953,86 @@ def render_chat_interface():
                 current_project.add_message("assistant", error_message)
 
 
+# The text of the help section at the bottom of the page
+# Kept here (written once, without indentation) like WELCOME_MARKDOWN
+# Each list has a blank line before it, so the "markdown" library (used
+# by get_help_html) recognizes it as a list, just like Streamlit does
+HELP_MARKDOWN = """### How to Use This App
+
+**Projects:**
+
+- Create separate projects for different learning topics
+- Each project maintains its own conversation history
+- Switch between projects using the sidebar
+
+**Deep Research Mode:**
+
+- Toggle this for more detailed, thorough responses
+- Uses a more powerful AI model
+- Responses may take slightly longer
+
+**Tips for Best Results:**
+
+- Be specific in your questions
+- Ask for code examples when you need them
+- If an answer isn't clear, ask for clarification
+- Use projects to organize different areas of learning
+
+**Example Questions:**
+
+- "How do I create a DataView table showing all notes with a specific tag?"
+- "Give me a Templater template for meeting notes"
+- "What's the difference between tags and links?"
+- "How can I search for notes modified in the last week?"
+
+### Troubleshooting
+
+**If you get an error:**
+
+1. Check that your API key is set in `.streamlit/secrets.toml`
+2. Try again - sometimes the AI service is busy
+3. Make sure you have internet connection
+4. Check the error message for specific guidance
+
+**If responses are slow:**
+
+- The free Hugging Face API can be slow during busy times
+- Deep Research Mode is slower but more thorough
+- Consider shorter questions for faster responses"""
+
+
+@st.cache_resource(show_spinner=False)
+def get_help_html():
+    """
+    Turns the help text into HTML ONCE, if the optional library is installed.
+
+    The help text never changes, but st.markdown() makes Streamlit and the
+    browser read ("parse") the markdown again on every rerun. With the
+    "markdown" library we convert it to HTML one time and reuse that;
+    st.html() shows HTML as it is, without parsing anything.
+
+    To use it, run: pip install markdown
+
+    Parameters: None
+
+    Returns:
+        string: The help section as HTML, or None if "markdown" isn't installed
+
+    Example usage:
+        help_html = get_help_html()
+        if help_html is not None:
+            st.html(help_html)
+    """
+
+    try:
+        import markdown
+    except ImportError:
+        # Not installed - render_help_section shows the markdown instead
+        return None
+
+    return markdown.markdown(HELP_MARKDOWN)
+
+
 def render_help_section():
     """
     Creates an expandable help section with usage tips.
@@ -1375,44 +3050,13 @@ def render_help_section():
     # Create an expander (collapsible section)
     # st.expander creates a section that starts collapsed
     with st.expander("❓ Help & Tips"):
-        st.markdown("""
-        ### How to Use This App
-
-        **Projects:**
-        - Create separate projects for different learning topics
-        - Each project maintains its own conversation history
-        - Switch between projects using the sidebar
-
-        **Deep Research Mode:**
-        - Toggle this for more detailed, thorough responses
-        - Uses a more powerful AI model
-        - Responses may take slightly longer
-
-        **Tips for Best Results:**
-        - Be specific in your questions
-        - Ask for code examples when you need them
-        - If an answer isn't clear, ask for clarification
-        - Use projects to organize different areas of learning
-
-        **Example Questions:**
-        - "How do I create a DataView table showing all notes with a specific tag?"
-        - "Give me a Templater template for meeting notes"
-        - "What's the difference between tags and links?"
-        - "How can I search for notes modified in the last week?"
-
-        ### Troubleshooting
-
-        **If you get an error:**
-        1. Check that your API key is set in `.streamlit/secrets.toml`
-        2. Try again - sometimes the AI service is busy
-        3. Make sure you have internet connection
-        4. Check the error message for specific guidance
-
-        **If responses are slow:**
-        - The free Hugging Face API can be slow during busy times
-        - Deep Research Mode is slower but more thorough
-        - Consider shorter questions for faster responses
-        """)
+        # With the optional "markdown" library we show HTML that was made
+        # once (see get_help_html); otherwise the markdown text as before
+        help_html = get_help_html()
+        if help_html is not None:
+            st.html(help_html)
+        else:
+            st.markdown(HELP_MARKDOWN)
 
 
 # ============================================
@@ -1450,10 +3094,22 @@ def main():
     # Step 2: Initialize session state (app memory)
     initialize_session_state()
 
+    # Open the connection to the AI service in the background
+    # (only on the very first run - see start_connection_warmup)
+    start_connection_warmup()
+
     # Step 3: Draw the sidebar with project controls
     render_sidebar()
 
     # Step 4: Draw the main chat interface
+    # The chat box is created here, outside the chat fragment, so
+    # Streamlit keeps it pinned to the bottom of the page
+    # on_submit runs BEFORE this rerun, so the chat sees the new message
+    st.chat_input(
+        "Ask me anything about Obsidian...",
+        key="chat_input",
+        on_submit=remember_user_message
+    )
     render_chat_interface()
 
     # Step 5: Add help section at the bottom
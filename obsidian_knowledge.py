@@ -22,6 +22,17 @@ How it works:
 ===============================================================================
 """
 
+# lru_cache: Remembers a function's result so it only runs once
+# We use it to build the search index a single time
+from functools import lru_cache
+
+# re (regular expressions): Splits a question into separate words
+import re
+
+# MappingProxyType: A read-only "window" onto a dictionary
+# We use it so the knowledge base can't be changed by accident
+from types import MappingProxyType
+
 
 # ============================================
 # SECTION 1: SYSTEM CONTEXT
@@ -494,6 +505,105 @@ COMMON_PROBLEMS = {
 }
 
 
+# ============================================
+# FREEZE THE KNOWLEDGE BASE
+# ============================================
+"""
+The knowledge base is built once, when this file is first imported, and
+the finished text and search index are remembered (see get_cached_context
+and build_search_index). If some code later changed one of these
+dictionaries, the remembered versions would silently be out of date.
+
+So we make every dictionary (and every example inside it) READ-ONLY.
+Reading works exactly as before (["key"], .get(), .items(), in), but
+trying to change something raises an error right away.
+"""
+
+
+def freeze_examples(examples):
+    """
+    Returns a read-only version of an examples dictionary.
+
+    Parameters:
+        examples (dictionary): Topic -> {"question": ..., "answer": ...}
+
+    Returns:
+        MappingProxyType: The same data, but it can't be changed
+
+    Example usage:
+        DATAVIEW_EXAMPLES = freeze_examples(DATAVIEW_EXAMPLES)
+    """
+
+    return MappingProxyType({
+        topic: MappingProxyType(example_data)
+        for topic, example_data in examples.items()
+    })
+
+
+DATAVIEW_EXAMPLES = freeze_examples(DATAVIEW_EXAMPLES)
+TEMPLATER_EXAMPLES = freeze_examples(TEMPLATER_EXAMPLES)
+GENERAL_OBSIDIAN_TIPS = freeze_examples(GENERAL_OBSIDIAN_TIPS)
+COMMON_PROBLEMS = freeze_examples(COMMON_PROBLEMS)
+
+
+# ============================================
+# ONE TABLE FOR EVERY EXAMPLE
+# ============================================
+"""
+The four dictionaries above are easy to read and edit, but code that
+needs ALL the examples would have to loop over each one separately,
+with the same steps written out four times.
+
+So we describe each section once here, and build_knowledge_table()
+lays every example out as one flat list that a single loop can walk.
+"""
+
+# How each section is labelled, shown to the AI, and searched
+#   type: The label search results get (like "DataView")
+#   heading: The section title in the AI's context
+#   question_key / answer_key: Which fields hold the question and answer
+#   context_format: How one example is written in the AI's context
+#   searchable: Whether search_knowledge_base looks in this section
+KNOWLEDGE_SECTIONS = (
+    {
+        "type": "DataView",
+        "heading": "DATAVIEW EXAMPLES",
+        "examples": DATAVIEW_EXAMPLES,
+        "question_key": "question",
+        "answer_key": "answer",
+        "context_format": "\n{question}\n{answer}\n",
+        "searchable": True,
+    },
+    {
+        "type": "Templater",
+        "heading": "TEMPLATER EXAMPLES",
+        "examples": TEMPLATER_EXAMPLES,
+        "question_key": "question",
+        "answer_key": "answer",
+        "context_format": "\n{question}\n{answer}\n",
+        "searchable": True,
+    },
+    {
+        "type": "General Tip",
+        "heading": "GENERAL OBSIDIAN TIPS",
+        "examples": GENERAL_OBSIDIAN_TIPS,
+        "question_key": "question",
+        "answer_key": "answer",
+        "context_format": "\n{question}\n{answer}\n",
+        "searchable": True,
+    },
+    {
+        "type": "Common Problem",
+        "heading": "COMMON PROBLEMS & SOLUTIONS",
+        "examples": COMMON_PROBLEMS,
+        "question_key": "problem",
+        "answer_key": "solution",
+        "context_format": "\nProblem: {question}\nSolution: {answer}\n",
+        "searchable": False,
+    },
+)
+
+
 # ============================================
 # SECTION 6: HELPER FUNCTIONS
 # ============================================
@@ -521,13 +631,10 @@ def get_dataview_example(topic):
         print(example["answer"])  # Prints the explanation and code
     """
 
-    # Check if the topic exists in our dictionary
     # .get() is safer than [] because it returns None instead of crashing
-    # if the topic doesn't exist
-    if topic in DATAVIEW_EXAMPLES:
-        return DATAVIEW_EXAMPLES[topic]
-    else:
-        return None
+    # if the topic doesn't exist - and it only looks the topic up once
+    # (checking "if topic in ..." first and then reading it looks twice)
+    return DATAVIEW_EXAMPLES.get(topic)
 
 
 def get_templater_example(topic):
@@ -547,10 +654,7 @@ def get_templater_example(topic):
     """
 
     # Same pattern as get_dataview_example
-    if topic in TEMPLATER_EXAMPLES:
-        return TEMPLATER_EXAMPLES[topic]
-    else:
-        return None
+    return TEMPLATER_EXAMPLES.get(topic)
 
 
 def get_general_tip(topic):
@@ -569,11 +673,44 @@ def get_general_tip(topic):
             print(tip["answer"])
     """
 
-    if topic in GENERAL_OBSIDIAN_TIPS:
-        return GENERAL_OBSIDIAN_TIPS[topic]
-    else:
+    return GENERAL_OBSIDIAN_TIPS.get(topic)
+
+
+# Which dictionary holds each category (used by get_example)
+EXAMPLE_CATEGORIES = {
+    "dataview": DATAVIEW_EXAMPLES,
+    "templater": TEMPLATER_EXAMPLES,
+    "tips": GENERAL_OBSIDIAN_TIPS,
+    "problems": COMMON_PROBLEMS,
+}
+
+
+def get_example(category, topic):
+    """
+    Retrieves an example from any part of our knowledge base.
+
+    One function for every category, instead of one function each.
+
+    Parameters:
+        category (string): "dataview", "templater", "tips", or "problems"
+        topic (string): Which example to retrieve (like "basic_table")
+
+    Returns:
+        dictionary: The example, or None if the category or topic
+                    doesn't exist
+
+    Example usage:
+        example = get_example("dataview", "basic_table")
+        if example:
+            print(example["answer"])
+    """
+
+    examples = EXAMPLE_CATEGORIES.get(category)
+    if examples is None:
         return None
 
+    return examples.get(topic)
+
 
 def get_all_examples_as_context():
     """
@@ -593,41 +730,222 @@ def get_all_examples_as_context():
         # Send this context to the AI along with user's question
     """
 
-    # Start with an empty string
-    # We'll add to it piece by piece
-    context = ""
+    # Collect the pieces in a list and glue them together once at the end
+    # (adding to a string over and over makes a new copy every time)
+    context_parts = ["=== YOUR ROLE ===\n", SYSTEM_CONTEXT, "\n"]
+
+    # One loop over every example, adding a section title whenever
+    # we move on to a new section (each title brings its own blank line)
+    current_heading = None
+    for example_type, heading, question, answer, context_text, searchable in build_knowledge_table():
+        if heading != current_heading:
+            context_parts.append(f"\n=== {heading} ===\n")
+            current_heading = heading
+        context_parts.append(context_text)
+
+    # Join everything into the complete context
+    return "".join(context_parts)
+
+
+@lru_cache(maxsize=None)
+def build_knowledge_table():
+    """
+    Lays out every example from every section as one flat list (runs once).
+
+    Parameters: None
+
+    Returns:
+        tuple: One row per example, in knowledge-base order, each a tuple of
+               (type, heading, question, answer, context_text, searchable)
+               where context_text is the example already written out
+               the way the AI's context shows it
+
+    Example usage:
+        for example_type, heading, question, *_ in build_knowledge_table():
+            print(f"[{example_type}] {question}")
+    """
+
+    table = []
+    for section in KNOWLEDGE_SECTIONS:
+        for example_data in section["examples"].values():
+            question = example_data[section["question_key"]]
+            answer = example_data[section["answer_key"]]
+            context_text = section["context_format"].format(question=question, answer=answer)
+            table.append((
+                section["type"], section["heading"], question, answer,
+                context_text, section["searchable"],
+            ))
+
+    # A tuple can't be changed by accident (the cached copy stays correct)
+    return tuple(table)
+
+
+@lru_cache(maxsize=1)
+def get_cached_context():
+    """
+    Returns the text from get_all_examples_as_context(), built only once.
+
+    Every message we send to the AI includes the whole knowledge base.
+    Building that text means looping over every example and gluing
+    strings together - and the result is always the same, because the
+    knowledge base never changes while the app runs.
+
+    @lru_cache remembers the finished text after the first call,
+    so every later call hands back that same string instantly.
+
+    Why here and not in app.py?
+    Streamlit re-runs app.py on every click (which would reset the
+    cache), but this file is only imported once.
+
+    Parameters: None
+
+    Returns:
+        string: All knowledge combined into readable text
+
+    Example usage:
+        context = get_cached_context()  # Fast after the first call
+    """
+
+    return get_all_examples_as_context()
 
-    # Add the system context first
-    context += "=== YOUR ROLE ===\n"
-    context += SYSTEM_CONTEXT + "\n\n"
 
-    # Add all DataView examples
-    context += "=== DATAVIEW EXAMPLES ===\n"
-    # Loop through each example in the dictionary
-    for topic_name, example_data in DATAVIEW_EXAMPLES.items():
-        context += f"\n{example_data['question']}\n"
-        context += f"{example_data['answer']}\n"
+@lru_cache(maxsize=None)
+def build_search_index():
+    """
+    Prepares our knowledge base for fast searching (runs only once).
+
+    Searching used to lowercase every question and answer on EVERY search.
+    The knowledge base never changes while the app runs, so we do that
+    work once here and keep the result. @lru_cache makes later calls
+    return the saved index instantly.
 
-    # Add all Templater examples
-    context += "\n=== TEMPLATER EXAMPLES ===\n"
-    for topic_name, example_data in TEMPLATER_EXAMPLES.items():
-        context += f"\n{example_data['question']}\n"
-        context += f"{example_data['answer']}\n"
+    Parameters: None
+
+    Returns:
+        tuple: One entry per example, each a tuple of
+               (question_lower, answer_lower, type, question, answer)
+
+    Example usage:
+        index = build_search_index()
+        print(len(index))  # How many examples we can search
+    """
+
+    index = []
+    for example_type, heading, question, answer, context_text, searchable in build_knowledge_table():
+        if searchable:
+            # Save the lowercase versions now so searches don't redo it
+            index.append((question.lower(), answer.lower(), example_type, question, answer))
+
+    # A tuple can't be changed by accident (the cached copy stays correct)
+    return tuple(index)
+
+
+# Splits lowercase text into words (runs of letters and digits)
+SEARCH_WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=None)
+def build_word_index():
+    """
+    Builds an "inverted index": for every word, which examples contain it.
 
-    # Add general tips
-    context += "\n=== GENERAL OBSIDIAN TIPS ===\n"
-    for topic_name, tip_data in GENERAL_OBSIDIAN_TIPS.items():
-        context += f"\n{tip_data['question']}\n"
-        context += f"{tip_data['answer']}\n"
+    It's like the index at the back of a book. Instead of reading every
+    page to find "table", you look up "table" and get the page numbers.
+    Here the "page numbers" are positions in build_search_index().
 
-    # Add common problems
-    context += "\n=== COMMON PROBLEMS & SOLUTIONS ===\n"
-    for problem_name, problem_data in COMMON_PROBLEMS.items():
-        context += f"\nProblem: {problem_data['problem']}\n"
-        context += f"Solution: {problem_data['solution']}\n"
+    Parameters: None
+
+    Returns:
+        dictionary: word -> frozenset of example positions
+
+    Example usage:
+        word_index = build_word_index()
+        print(word_index.get("table"))  # e.g. frozenset({0, 2, 5})
+    """
+
+    word_index = {}
+    for position, (question_lower, answer_lower, *_) in enumerate(build_search_index()):
+        # set() so an example is listed only once per word
+        words = set(SEARCH_WORD_PATTERN.findall(question_lower))
+        words.update(SEARCH_WORD_PATTERN.findall(answer_lower))
+        for word in words:
+            word_index.setdefault(word, set()).add(position)
+
+    # frozenset: the cached index can't be changed by accident
+    return {word: frozenset(positions) for word, positions in word_index.items()}
+
+
+@lru_cache(maxsize=None)
+def build_word_part_trie():
+    """
+    Builds a "suffix trie" so we can find any piece of a word quickly.
+
+    A trie is a tree of letters: to look up "tab" you step t -> a -> b.
+    We add every ending of every word ("table", "able", "ble", "le", "e"),
+    so walking from the top finds words that contain "tab" ANYWHERE,
+    not just at the start. Each step remembers which examples pass
+    through it, so the walk ends with the answer already in hand.
+
+    The work depends only on how long the search word is, not on how
+    big the knowledge base gets.
+
+    Parameters: None
+
+    Returns:
+        dictionary: The top of the tree. Each node is a dictionary with
+                    "children" (letter -> node) and "positions"
+                    (frozenset of positions in build_search_index())
+
+    Example usage:
+        trie = build_word_part_trie()
+        print(sorted(trie["children"]))  # Every letter/digit we know
+    """
 
-    # Return the complete context
-    return context
+    root = {"children": {}, "positions": set()}
+
+    for word, word_positions in build_word_index().items():
+        for start in range(len(word)):
+            node = root
+            for letter in word[start:]:
+                node = node["children"].setdefault(letter, {"children": {}, "positions": set()})
+                node["positions"].update(word_positions)
+
+    # Freeze every node's positions so the cached trie can't be changed
+    # (a list of nodes still to visit, instead of recursion)
+    nodes_to_freeze = [root]
+    while nodes_to_freeze:
+        node = nodes_to_freeze.pop()
+        node["positions"] = frozenset(node["positions"])
+        nodes_to_freeze.extend(node["children"].values())
+
+    return root
+
+
+def find_examples_with_word_part(word_part):
+    """
+    Finds every example that has a word CONTAINING the given text.
+
+    Searching "tab" should still find "table", so we can't only look up
+    whole words. Instead we walk the suffix trie one letter at a time.
+
+    Parameters:
+        word_part (string): A lowercase word or piece of a word
+
+    Returns:
+        frozenset: Positions in build_search_index() that may match
+
+    Example usage:
+        positions = find_examples_with_word_part("tab")
+    """
+
+    node = build_word_part_trie()
+    for letter in word_part:
+        node = node["children"].get(letter)
+        if node is None:
+            # No word in the knowledge base contains this text
+            return frozenset()
+
+    return node["positions"]
 
 
 def search_knowledge_base(search_term):
@@ -653,91 +971,111 @@ def search_knowledge_base(search_term):
     # This means "TABLE", "table", and "Table" all match
     search_term_lower = search_term.lower()
 
+    search_index = build_search_index()
+
+    # Use the word index to find the few examples that COULD match:
+    # each word of the search has to appear inside some word of the example
+    search_words = SEARCH_WORD_PATTERN.findall(search_term_lower)
+    if search_words:
+        candidate_positions = find_examples_with_word_part(search_words[0])
+        for word in search_words[1:]:
+            candidate_positions = candidate_positions & find_examples_with_word_part(word)
+        # sorted() keeps results in the same order as the knowledge base
+        candidates = [search_index[position] for position in sorted(candidate_positions)]
+    else:
+        # Nothing to look up (e.g. searching for "```") - check everything
+        candidates = search_index
+
     # Create an empty list to store matching results
     matching_examples = []
 
-    # Search through DataView examples
-    for topic_name, example_data in DATAVIEW_EXAMPLES.items():
+    # Confirm each candidate really contains the whole search term
+    for question_lower, answer_lower, example_type, question, answer in candidates:
         # Check if search term appears in question or answer
-        # We convert to lowercase for case-insensitive matching
-        question_lower = example_data["question"].lower()
-        answer_lower = example_data["answer"].lower()
-
         if search_term_lower in question_lower or search_term_lower in answer_lower:
             # Found a match! Add it to our results
             matching_examples.append({
-                "type": "DataView",
-                "question": example_data["question"],
-                "answer": example_data["answer"],
-            })
-
-    # Search through Templater examples (same pattern)
-    for topic_name, example_data in TEMPLATER_EXAMPLES.items():
-        question_lower = example_data["question"].lower()
-        answer_lower = example_data["answer"].lower()
-
-        if search_term_lower in question_lower or search_term_lower in answer_lower:
-            matching_examples.append({
-                "type": "Templater",
-                "question": example_data["question"],
-                "answer": example_data["answer"],
-            })
-
-    # Search through general tips (same pattern)
-    for topic_name, tip_data in GENERAL_OBSIDIAN_TIPS.items():
-        question_lower = tip_data["question"].lower()
-        answer_lower = tip_data["answer"].lower()
-
-        if search_term_lower in question_lower or search_term_lower in answer_lower:
-            matching_examples.append({
-                "type": "General Tip",
-                "question": tip_data["question"],
-                "answer": tip_data["answer"],
+                "type": example_type,
+                "question": question,
+                "answer": answer,
             })
 
     # Return all matches we found (or empty list if none)
     return matching_examples
 
 
-# ============================================
-# TESTING CODE
-# ============================================
-"""
-This section only runs when you run this file directly.
-It's for testing that everything works correctly.
-
-When you import this file from app.py, this code doesn't run.
-"""
+# Common words that appear in almost every question, so they say nothing
+# about WHICH example is relevant (short words like "how" are skipped anyway)
+SEARCH_STOP_WORDS = frozenset({
+    "what", "when", "where", "which", "with", "does", "have", "this", "that",
+    "there", "these", "from", "into", "your", "about", "make", "want", "need",
+    "please", "should", "could", "would", "obsidian",
+})
 
-if __name__ == "__main__":
-    # This only runs if you execute: python obsidian_knowledge.py
 
-    print("Testing knowledge base functions...\n")
+def get_relevant_context(question, max_examples=4):
+    """
+    Builds a SHORT knowledge text with only the examples that fit a question.
 
-    # Test 1: Get a specific example
-    print("Test 1: Getting DataView basic_table example")
-    example = get_dataview_example("basic_table")
-    if example:
-        print(f"✓ Found: {example['question']}")
-    else:
-        print("✗ Failed to retrieve example")
+    get_cached_context() contains every example we have. That's fine for
+    OpenAI (which caches the repeated start of a prompt), but Hugging Face
+    models get the whole text uploaded and re-read on every message - and
+    many of them can only read about a thousand tokens at all.
 
-    print("\n" + "="*50 + "\n")
+    Here we score each example by how many of the question's words it
+    contains (a word in the example's question counts double), and keep
+    only the best few. Each word is looked up once in the suffix trie
+    (see build_word_part_trie), so examples that share no words with
+    the question are never even looked at.
 
-    # Test 2: Search functionality
-    print("Test 2: Searching for 'table'")
-    results = search_knowledge_base("table")
-    print(f"✓ Found {len(results)} matching examples")
-    for result in results:
-        print(f"  - [{result['type']}] {result['question']}")
+    Parameters:
+        question (string): What the user asked
+        max_examples (integer): The most examples to include
 
-    print("\n" + "="*50 + "\n")
+    Returns:
+        string: Our role plus the most relevant examples.
+                If nothing matches, the full knowledge base instead.
 
-    # Test 3: Get all context
-    print("Test 3: Getting complete context")
-    context = get_all_examples_as_context()
-    # Show just the first 200 characters to verify it's working
-    print(f"✓ Generated context ({len(context)} characters)")
-    print(f"Preview: {context[:200]}...")
+    Example usage:
+        context = get_relevant_context("How do I make a dataview table?")
+    """
 
-    print("\n✓ All tests completed!")
+    # Split the question into lowercase words, keeping only useful ones
+    question_words = {
+        word for word in SEARCH_WORD_PATTERN.findall(question.lower())
+        if len(word) > 3 and word not in SEARCH_STOP_WORDS
+    }
+
+    # Look every question word up in the suffix trie at once, instead of
+    # searching every example's text for every word. Only examples that
+    # contain at least one word get a score at all.
+    # A word found in the example's question counts 2, otherwise 1
+    # (the trie already told us it's in the question or the answer)
+    search_index = build_search_index()
+    scores = {}
+    for word in question_words:
+        for position in find_examples_with_word_part(word):
+            question_lower = search_index[position][0]
+            if word in question_lower:
+                scores[position] = scores.get(position, 0) + 2
+            else:
+                scores[position] = scores.get(position, 0) + 1
+
+    # Back in knowledge-base order, so ties keep their original order
+    scored_examples = []
+    for position in sorted(scores):
+        question_lower, answer_lower, example_type, example_question, example_answer = search_index[position]
+        scored_examples.append((scores[position], example_type, example_question, example_answer))
+
+    # Nothing matched - better to send everything than nothing
+    if not scored_examples:
+        return get_cached_context()
+
+    # Highest score first; sorted() keeps the original order for ties
+    scored_examples = sorted(scored_examples, key=lambda example: example[0], reverse=True)
+
+    context_parts = ["=== YOUR ROLE ===\n", SYSTEM_CONTEXT, "\n\n", "=== RELEVANT EXAMPLES ===\n"]
+    for score, example_type, example_question, example_answer in scored_examples[:max_examples]:
+        context_parts.append(f"\n[{example_type}] {example_question}\n{example_answer}\n")
+
+    return "".join(context_parts)
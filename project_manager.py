@@ -28,13 +28,15 @@ How it works:
 # SECTION 1: IMPORT WHAT WE NEED
 # ============================================
 """
-We need a couple of Python tools:
-- datetime: To track when projects are created
-- copy: To safely duplicate data without accidents
+We need a few Python tools:
+- sys: To share one copy of repeated text like "user" or a project name
+- time: To record when projects are created (fast)
+- datetime: To turn that moment into readable text like "2025-10-29 14:30"
 """
 
+import sys  # For sys.intern (one shared copy of each role name)
+import time  # For the moment a project was created
 from datetime import datetime  # For timestamps like "2025-10-29 14:30"
-import copy  # For making safe copies of data
 
 
 # ============================================
@@ -69,6 +71,13 @@ class ConversationProject:
         my_project.add_message("assistant", "Here's how...")
     """
 
+    # __slots__ lists every attribute a project has, up front
+    # Normally each object carries its own hidden dictionary of attributes;
+    # with __slots__ Python stores them in a fixed, compact layout instead.
+    # Projects use less memory and reading self.name etc. is a bit faster.
+    # (The catch: you can't add new attributes that aren't listed here.)
+    __slots__ = ("name", "roles", "contents", "created_timestamp", "deep_research_mode")
+
     def __init__(self, project_name):
         """
         This special function runs when you create a new project.
@@ -91,23 +100,61 @@ class ConversationProject:
         # The "self" refers to this specific project instance
         self.name = project_name
 
-        # Create an empty list to store messages
-        # Each message will be a dictionary with "role" and "content"
-        self.messages = []
+        # Two lists that store the messages side by side:
+        # roles[0] and contents[0] are the first message, and so on
+        # Why not one list of {"role": ..., "content": ...} dictionaries?
+        # Every small dictionary costs extra memory, and long chats have
+        # hundreds of messages. Two plain lists are smaller and faster to
+        # walk; we only build dictionaries when someone asks for them.
+        self.roles = []     # Who said it: "user" or "assistant"
+        self.contents = []  # What they said
 
         # Record when this project was created
-        # datetime.now() gets the current date and time
-        # We format it nicely like "2025-10-29 14:30:45"
-        self.created_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        # time.time() is the current moment as a number of seconds
+        # Turning it into text (strftime) is comparatively slow, so we
+        # only do that when someone reads created_date (see below)
+        self.created_timestamp = time.time()
 
         # Research mode setting
         # False = normal chat mode
         # True = deep research mode (more detailed responses)
         self.deep_research_mode = False
 
-        # Track how many messages have been sent
-        # Useful for showing project activity level
-        self.message_count = 0
+    @property
+    def created_date(self):
+        """
+        When this project was created, as readable text.
+
+        Returns:
+            string: Date and time like "2025-10-29 14:30:45"
+
+        Example:
+            print(f"Created: {project.created_date}")
+        """
+
+        # datetime.fromtimestamp() turns the saved number back into a date
+        # We format it nicely like "2025-10-29 14:30:45"
+        return datetime.fromtimestamp(self.created_timestamp).strftime("%Y-%m-%d %H:%M:%S")
+
+    @property
+    def message_count(self):
+        """
+        How many messages this project has.
+
+        @property lets us read this like a normal value
+        (project.message_count, no brackets), but it's worked out
+        from the message list each time. So it can never disagree
+        with the real number of messages - there's no separate
+        counter to keep up to date.
+
+        Returns:
+            integer: Number of messages in this project
+
+        Example:
+            print(f"Messages: {project.message_count}")
+        """
+
+        return len(self.roles)
 
     def add_message(self, role, content):
         """
@@ -129,21 +176,51 @@ class ConversationProject:
             project.add_message("assistant", "Use [[note name]]")
         """
 
-        # Create a dictionary for this message
-        # A dictionary stores related information together
-        # Like a labeled box: {"role": "user", "content": "Hello"}
-        new_message = {
-            "role": role,        # Who said it: "user" or "assistant"
-            "content": content,  # What they said
-        }
+        # Add this message to the end of both lists
+        # .append() puts it at the end, so the positions always line up
+        # sys.intern() makes every "user" (and every "assistant") the very
+        # same string object, so thousands of messages share two strings
+        # instead of each keeping its own copy
+        self.roles.append(sys.intern(role))
+        self.contents.append(content)
+
+    def add_messages_bulk(self, pairs):
+        """
+        Adds many messages at once (for example, when importing a chat).
+
+        Calling add_message() in a loop works too, but each call has its
+        own small overhead. Here we add everything with two .extend()
+        calls, which do the looping inside Python itself.
+
+        Parameters:
+            pairs (list or any iterable): (role, content) pairs, oldest first
+
+        Returns:
+            None (just adds to the lists)
+
+        Example:
+            project.add_messages_bulk([
+                ("user", "How do I link notes?"),
+                ("assistant", "Use [[note name]]"),
+            ])
+        """
 
-        # Add this message to our list of messages
-        # .append() puts it at the end of the list
-        self.messages.append(new_message)
+        # Turn generators and other one-time iterables into a list first:
+        # an empty iterator is still "truthy", so the check below would
+        # miss it and zip(*[]) would have nothing to unpack
+        pairs = list(pairs)
 
-        # Increase our message counter
-        # This helps us track how active this project is
-        self.message_count = self.message_count + 1
+        # Nothing to add?
+        if not pairs:
+            return
+
+        # zip(*pairs) splits [(role, content), ...] into all the roles
+        # and all the contents, keeping them in the same order
+        new_roles, new_contents = zip(*pairs)
+
+        # Same shared role strings as add_message()
+        self.roles.extend(sys.intern(role) for role in new_roles)
+        self.contents.extend(new_contents)
 
     def get_messages(self):
         """
@@ -163,11 +240,63 @@ class ConversationProject:
                 print(f"{message['role']}: {message['content']}")
         """
 
-        # Return a copy of messages, not the original
-        # Why? If someone modifies the returned list, we don't want
-        # it to accidentally change our stored messages
-        # copy.deepcopy() creates a completely separate copy
-        return copy.deepcopy(self.messages)
+        # Build a fresh dictionary for each message
+        # zip() walks both lists together: (roles[0], contents[0]), ...
+        # These are new dictionaries, so if someone modifies the returned
+        # list, it can't accidentally change our stored messages
+        return [
+            {"role": role, "content": content}
+            for role, content in zip(self.roles, self.contents)
+        ]
+
+    def get_messages_page(self, before=None, limit=50):
+        """
+        Returns one "page" of messages, counting back from the newest.
+
+        Long conversations can have hundreds of messages. Showing (and
+        copying) all of them every time is slow, so we hand them out in
+        pages - like a chat app that loads older messages when you scroll up.
+
+        A "cursor" is a bookmark: it remembers where the page started,
+        so you can ask for the page just before it next time.
+
+        Parameters:
+            before (integer): Return messages that come before this position.
+                              None means "start from the newest message".
+            limit (integer): Maximum number of messages in the page
+
+        Returns:
+            tuple: (messages, next_cursor)
+                messages: List of message dictionaries, oldest first
+                next_cursor: Pass this as "before" to get the previous page,
+                             or None if there are no older messages
+
+        Example:
+            page, cursor = project.get_messages_page(limit=20)  # newest 20
+            if cursor is not None:
+                older_page, cursor = project.get_messages_page(before=cursor, limit=20)
+        """
+
+        # No bookmark yet? Start right after the newest message
+        if before is None:
+            before = len(self.roles)
+
+        # Find where this page starts (but never go below 0)
+        start = max(0, before - limit)
+
+        # Build dictionaries for just this slice, like get_messages() does
+        page = [
+            {"role": role, "content": content}
+            for role, content in zip(self.roles[start:before], self.contents[start:before])
+        ]
+
+        # If the page didn't reach the very first message, there's more to load
+        if start > 0:
+            next_cursor = start
+        else:
+            next_cursor = None
+
+        return page, next_cursor
 
     def clear_messages(self):
         """
@@ -180,15 +309,13 @@ class ConversationProject:
         Returns: None
 
         Example:
-            project.clear_messages()  # Now project.messages is empty
+            project.clear_messages()  # Now the project has no messages
         """
 
-        # Reset messages to an empty list
+        # Reset both message lists to empty
         # This removes all previous messages
-        self.messages = []
-
-        # Reset message counter back to zero
-        self.message_count = 0
+        self.roles = []
+        self.contents = []
 
     def get_summary(self):
         """
@@ -258,10 +385,10 @@ class ConversationProject:
 
         # Check if there are any messages
         # len() tells us how many items are in the list
-        if len(self.messages) > 0:
+        if len(self.roles) > 0:
             # Return the last message
             # In Python, [-1] means "the last item in the list"
-            return self.messages[-1]
+            return {"role": self.roles[-1], "content": self.contents[-1]}
         else:
             # No messages exist yet
             return None
@@ -298,6 +425,9 @@ class ProjectManager:
         manager.switch_to_project("DataView Learning")
     """
 
+    # Every attribute a manager has, listed up front (see ConversationProject)
+    __slots__ = ("projects", "current_project_name", "version", "cached_project_names", "cached_names_version")
+
     def __init__(self):
         """
         Sets up the project manager when you first create it.
@@ -320,6 +450,16 @@ class ProjectManager:
         # At the start, no project is selected yet
         self.current_project_name = None
 
+        # A counter that goes up by one every time a project is created,
+        # deleted or switched to. Anything we remember about the projects
+        # (like the list of names below) is still correct as long as the
+        # counter hasn't moved since we saved it.
+        self.version = 0
+
+        # The remembered list of project names, and the version it belongs to
+        self.cached_project_names = ()
+        self.cached_names_version = -1
+
     def create_project(self, project_name):
         """
         Creates a new project with the given name.
@@ -338,6 +478,12 @@ class ProjectManager:
                 print("Project created!")
         """
 
+        # sys.intern() keeps one shared copy of this name, used as the
+        # dictionary key, the project's name, and current_project_name.
+        # Later lookups with an interned name can match it by identity
+        # instead of comparing the text letter by letter.
+        project_name = sys.intern(project_name)
+
         # Check if a project with this name already exists
         # We don't want two projects with the same name (confusing!)
         if project_name in self.projects:
@@ -350,6 +496,7 @@ class ProjectManager:
         # Add it to our dictionary of projects
         # Now self.projects["Learning DataView"] = the new project
         self.projects[project_name] = new_project
+        self.version = self.version + 1
 
         # If this is the first project, make it the current one
         # This is helpful for users - they don't have to switch manually
@@ -359,6 +506,53 @@ class ProjectManager:
         # Success! Project was created
         return True
 
+    def create_projects(self, project_names):
+        """
+        Creates several projects in one go (for example, when importing).
+
+        Works like calling create_project() for each name, but the setup
+        happens once for the whole batch instead of once per name.
+
+        Parameters:
+            project_names (list): The names of the new projects
+
+        Returns:
+            list: One True/False per name, in the same order
+                  (False means that name was already taken)
+
+        Example:
+            results = manager.create_projects(["DataView", "Templater"])
+            print(results)  # [True, True]
+        """
+
+        # A short local name for the dictionary - quicker to reach than
+        # self.projects on every trip around the loop
+        projects = self.projects
+
+        results = []
+        for project_name in project_names:
+            # Same shared copy of the name as create_project()
+            project_name = sys.intern(project_name)
+
+            # Name taken (already existed, or earlier in this batch)
+            if project_name in projects:
+                results.append(False)
+                continue
+
+            projects[project_name] = ConversationProject(project_name)
+
+            # The first project ever becomes the current one
+            if self.current_project_name is None:
+                self.current_project_name = project_name
+
+            results.append(True)
+
+        # Anything new? One version bump covers the whole batch
+        if True in results:
+            self.version = self.version + 1
+
+        return results
+
     def delete_project(self, project_name):
         """
         Removes a project permanently.
@@ -375,27 +569,26 @@ class ProjectManager:
             manager.delete_project("Old Project")
         """
 
-        # Check if the project exists
-        if project_name not in self.projects:
+        # Remove the project from our dictionary
+        # .pop() removes a key-value pair and gives back the value -
+        # or None if the name isn't there (projects themselves are never None)
+        # That's one lookup, instead of checking first and deleting after
+        removed_project = self.projects.pop(project_name, None)
+        if removed_project is None:
             # Can't delete something that doesn't exist
             return False
 
-        # Remove the project from our dictionary
-        # del removes a key-value pair from the dictionary
-        del self.projects[project_name]
+        self.version = self.version + 1
 
         # If we just deleted the current project, we need to switch
         # to a different one (or None if no projects left)
         if self.current_project_name == project_name:
-            # Get list of remaining project names
-            remaining_projects = list(self.projects.keys())
-
             # If there are other projects, switch to the first one
             # If not, set current_project_name to None
-            if len(remaining_projects) > 0:
-                self.current_project_name = remaining_projects[0]
-            else:
-                self.current_project_name = None
+            # iter() walks the names in the order they were created, and
+            # next() takes just the first one (or None if there are none) -
+            # no need to copy every remaining name into a list first
+            self.current_project_name = next(iter(self.projects), None)
 
         # Successfully deleted
         return True
@@ -416,6 +609,9 @@ class ProjectManager:
             manager.switch_to_project("DataView Learning")
         """
 
+        # Use the same shared copy of the name as create_project()
+        project_name = sys.intern(project_name)
+
         # Check if the project exists
         if project_name not in self.projects:
             # Can't switch to something that doesn't exist
@@ -423,6 +619,7 @@ class ProjectManager:
 
         # Update which project is current
         self.current_project_name = project_name
+        self.version = self.version + 1
 
         # Successfully switched
         return True
@@ -444,28 +641,28 @@ class ProjectManager:
                 print(f"Working in: {current.name}")
         """
 
-        # Check if a project is selected
-        if self.current_project_name is None:
-            return None
-
-        # Check if the current project name actually exists
-        # (safety check in case something went wrong)
-        if self.current_project_name not in self.projects:
-            return None
-
-        # Return the actual project object
-        return self.projects[self.current_project_name]
+        # .get() returns the project, or None if there isn't one:
+        # - no project selected (current_project_name is None, and
+        #   None is never used as a project name)
+        # - the name doesn't exist (safety check in case something went wrong)
+        # One lookup covers both, instead of checking first and reading after
+        return self.projects.get(self.current_project_name)
 
     def get_all_project_names(self):
         """
-        Returns a list of all project names.
+        Returns all project names, in the order they were created.
 
         Useful for showing users what projects exist so they can choose one.
 
+        The sidebar asks for this on every rerun, but the names only change
+        when a project is created or deleted. So we build the tuple once and
+        hand out the same one until self.version says something changed.
+        (A tuple can't be changed by accident, so sharing it is safe.)
+
         Parameters: None
 
         Returns:
-            list: Names of all projects
+            tuple: Names of all projects
 
         Example:
             names = manager.get_all_project_names()
@@ -473,10 +670,40 @@ class ProjectManager:
                 print(f"- {name}")
         """
 
-        # Get all the keys from our projects dictionary
-        # Keys are the project names
-        # list() converts it to a regular list
-        return list(self.projects.keys())
+        # Only rebuild the names if projects changed since last time
+        if self.cached_names_version != self.version:
+            # Get all the keys from our projects dictionary
+            # Keys are the project names
+            self.cached_project_names = tuple(self.projects.keys())
+            self.cached_names_version = self.version
+
+        return self.cached_project_names
+
+    def iter_project_names(self):
+        """
+        Gives a live "view" of the project names, for looping over once.
+
+        get_all_project_names() hands out a saved tuple, which is best when
+        the same names are needed again and again (like the sidebar).
+        If you only want to loop over the names one time, this view is
+        even cheaper: nothing is copied at all, and len() and "in" work
+        on it directly.
+
+        Careful: the view follows the projects as they change, so don't
+        create or delete projects while looping over it.
+
+        Parameters: None
+
+        Returns:
+            dict_keys: The project names, in the order they were created
+
+        Example:
+            for name in manager.iter_project_names():
+                print(f"- {name}")
+        """
+
+        # .keys() doesn't copy anything - it looks straight at the dictionary
+        return self.projects.keys()
 
     def get_all_projects_summary(self):
         """
@@ -532,87 +759,41 @@ class ProjectManager:
         # "in" checks if a key exists
         return project_name in self.projects
 
-    def get_project_count(self):
+    @property
+    def project_count(self):
         """
-        Returns how many projects exist.
+        How many projects exist, read like a normal value.
 
-        Parameters: None
+        Works the same way as ConversationProject.message_count: it's
+        worked out from the projects dictionary each time, so there's no
+        separate counter that could fall out of step. len() on a
+        dictionary is instant, however many projects there are.
 
         Returns:
             integer: Number of projects
 
         Example:
-            count = manager.get_project_count()
-            print(f"You have {count} projects")
+            print(f"You have {manager.project_count} projects")
         """
 
-        # len() tells us how many items are in the dictionary
         return len(self.projects)
 
+    def get_project_count(self):
+        """
+        Returns how many projects exist.
 
-# ============================================
-# SECTION 4: TESTING CODE
-# ============================================
-"""
-This code only runs if you execute this file directly.
-It's for testing that our classes work correctly.
-"""
+        Kept only so older code that calls it keeps working.
+        New code should read manager.project_count instead.
+
+        Parameters: None
+
+        Returns:
+            integer: Number of projects (the same as project_count)
+
+        Example:
+            count = manager.get_project_count()
+            print(f"You have {count} projects")
+        """
 
-if __name__ == "__main__":
-    # This only runs if you execute: python project_manager.py
-
-    print("Testing ProjectManager...\n")
-
-    # Test 1: Create manager and project
-    print("Test 1: Creating manager and project")
-    manager = ProjectManager()
-    success = manager.create_project("Test Project")
-    if success:
-        print("✓ Project created successfully")
-    else:
-        print("✗ Failed to create project")
-
-    print("\n" + "="*50 + "\n")
-
-    # Test 2: Add messages to project
-    print("Test 2: Adding messages")
-    current = manager.get_current_project()
-    if current:
-        current.add_message("user", "Test question")
-        current.add_message("assistant", "Test answer")
-        print(f"✓ Added messages. Total: {current.message_count}")
-    else:
-        print("✗ Could not get current project")
-
-    print("\n" + "="*50 + "\n")
-
-    # Test 3: Create multiple projects
-    print("Test 3: Creating multiple projects")
-    manager.create_project("DataView Help")
-    manager.create_project("Templater Learning")
-    all_names = manager.get_all_project_names()
-    print(f"✓ Total projects: {len(all_names)}")
-    for name in all_names:
-        print(f"  - {name}")
-
-    print("\n" + "="*50 + "\n")
-
-    # Test 4: Switch projects
-    print("Test 4: Switching projects")
-    switched = manager.switch_to_project("DataView Help")
-    if switched:
-        current = manager.get_current_project()
-        print(f"✓ Switched to: {current.name}")
-    else:
-        print("✗ Failed to switch")
-
-    print("\n" + "="*50 + "\n")
-
-    # Test 5: Get summaries
-    print("Test 5: Getting project summaries")
-    summaries = manager.get_all_projects_summary()
-    print(f"✓ Got {len(summaries)} summaries:")
-    for summary in summaries:
-        print(f"  - {summary['name']} ({summary['message_count']} messages)")
-
-    print("\n✓ All tests completed!")
+        # One place decides the count: the project_count property
+        return self.project_count
@@ -0,0 +1,151 @@
+"""
+===============================================================================
+RATE LIMITER
+===============================================================================
+Purpose: This file keeps our app from sending requests to the AI services
+         faster than they allow.
+
+Why do we need this?
+    - OpenAI and Hugging Face only accept so many requests per second
+    - If we send too many, they answer "429 Too Many Requests" and the
+      user sees an error instead of an answer
+    - Deep Research Mode sends several requests at once, and many people
+      can use the app at the same time, so bursts happen easily
+
+How it works (the "token bucket"):
+    - Picture a bucket that holds a few tokens (like arcade tokens)
+    - Every request must take one token out of the bucket first
+    - The bucket slowly refills at a fixed rate (e.g. 3 tokens per second)
+    - If the bucket is empty, the request waits just long enough for
+      the next token to drip in - instead of sleeping a fixed time
+
+    Short bursts are fine (the bucket starts full), but over time we
+    never go faster than the refill rate.
+===============================================================================
+"""
+
+# Time: We measure how much time passed to know how many tokens refilled
+import time
+
+# Threading: reserve() may be called from more than one thread (see the
+# note on self.lock below), so the bucket needs a lock
+import threading
+
+# Asyncio: Lets async code (Deep Research fan-out) wait without blocking
+import asyncio
+
+
+# ============================================
+# TOKEN BUCKET CLASS
+# ============================================
+
+class TokenBucket:
+    """
+    Shares a "requests per second" budget between everyone using it.
+
+    Attributes:
+        rate (float): How many tokens are added back every second
+        capacity (float): The most tokens the bucket can hold (burst size)
+        tokens (float): How many tokens are in the bucket right now
+        last_refill (float): When we last added tokens (time.monotonic())
+        lock (threading.Lock): Keeps updates safe across threads
+
+    Example:
+        bucket = TokenBucket(rate=3)
+        await bucket.take_async()    # Waits (if needed) without blocking
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        Creates a new, full bucket.
+
+        Parameters:
+            rate (float): Tokens added per second (the long-run request limit)
+            capacity (float): Maximum burst size. Defaults to the rate,
+                              so we allow about one second's worth at once.
+
+        Example:
+            bucket = TokenBucket(rate=3)  # At most ~3 requests per second
+        """
+
+        self.rate = rate
+
+        if capacity is None:
+            capacity = rate
+        self.capacity = capacity
+
+        # Start full, so the first few requests go out right away
+        self.tokens = capacity
+
+        # time.monotonic() is a clock that never jumps backwards
+        # (unlike the wall clock, which can change with daylight saving)
+        self.last_refill = time.monotonic()
+
+        # Only one thread at a time may look at or change the tokens
+        # Today every caller is a coroutine on the app's single background
+        # event loop (see get_background_event_loop in app.py), where
+        # reserve() can't be interrupted anyway. We still use a
+        # threading.Lock (not asyncio.Lock, which only works inside one
+        # loop) so reserve() stays safe if it's ever called straight from
+        # a Streamlit session thread. With nobody waiting, it costs almost
+        # nothing.
+        self.lock = threading.Lock()
+
+    def reserve(self, amount=1):
+        """
+        Takes tokens out of the bucket and says how long to wait for them.
+
+        If there aren't enough tokens, we still take them (the count goes
+        below zero - like an IOU) and return how long until they'd have
+        dripped back in. That way waiting callers line up fairly instead
+        of all rushing in the moment a token appears.
+
+        Parameters:
+            amount (float): How many tokens this request needs (usually 1)
+
+        Returns:
+            float: Seconds the caller should wait before sending (0.0 = go now)
+
+        Example:
+            wait_seconds = bucket.reserve()
+        """
+
+        with self.lock:
+            now = time.monotonic()
+
+            # Add the tokens that dripped in since last time,
+            # but never more than the bucket can hold
+            elapsed = now - self.last_refill
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.last_refill = now
+
+            # Take our tokens (may go negative = waiting in line)
+            self.tokens = self.tokens - amount
+
+            if self.tokens >= 0:
+                return 0.0
+
+            # How long until the bucket is back at zero?
+            return -self.tokens / self.rate
+
+    async def take_async(self, amount=1):
+        """
+        Waits (if needed) until a request is allowed, for async code.
+
+        Uses asyncio.sleep, so other coroutines (like the other Deep
+        Research perspectives) keep running while this one waits.
+
+        Parameters:
+            amount (float): How many tokens this request needs
+
+        Returns:
+            None
+
+        Example:
+            await bucket.take_async()
+            response = await async_client.chat.completions.create(...)
+        """
+
+        wait_seconds = self.reserve(amount)
+        if wait_seconds > 0:
+            await asyncio.sleep(wait_seconds)
@@ -0,0 +1,134 @@
+"""
+===============================================================================
+RESPONSE CACHE
+===============================================================================
+Purpose: This file remembers AI answers so repeated questions can be
+         answered instantly, without calling the AI again.
+
+Why do we need this?
+    - In a knowledge-base app, many people ask the same questions
+    - Every AI call costs money and takes several seconds
+    - A remembered answer costs nothing and arrives immediately
+
+How it works:
+    - Each answer is stored under a "key" that describes the question
+      (see make_response_cache_key in app.py)
+    - Answers expire after a while (the "TTL" - time to live), so the
+      app doesn't keep serving an old answer forever
+    - The cache has a maximum size. When it's full, we forget the answer
+      that was used LEAST RECENTLY ("LRU" = least recently used)
+===============================================================================
+"""
+
+# OrderedDict: A dictionary that can move items to the end cheaply
+# We keep the most recently used answers at the end
+from collections import OrderedDict
+
+# Time: To know when an answer was saved (for expiry)
+import time
+
+# Threading: Several users can read and write the cache at the same time
+import threading
+
+
+# ============================================
+# RESPONSE CACHE CLASS
+# ============================================
+
+class ResponseCache:
+    """
+    Remembers recent AI answers, with a size limit and an expiry time.
+
+    Attributes:
+        max_entries (integer): The most answers we keep at once
+        ttl_seconds (float): How long an answer stays valid
+        entries (OrderedDict): key -> (time saved, answer), oldest-used first
+        lock (threading.Lock): Keeps updates safe across threads
+
+    Example:
+        cache = ResponseCache(max_entries=100, ttl_seconds=1800)
+        cache.set("some-key", "The answer")
+        print(cache.get("some-key"))  # "The answer"
+    """
+
+    def __init__(self, max_entries, ttl_seconds):
+        """
+        Creates a new, empty cache.
+
+        Parameters:
+            max_entries (integer): The most answers to keep at once
+            ttl_seconds (float): How many seconds an answer stays valid
+
+        Example:
+            cache = ResponseCache(max_entries=200, ttl_seconds=1800)
+        """
+
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Looks up a remembered answer.
+
+        Parameters:
+            key (string): The key the answer was saved under
+
+        Returns:
+            string: The answer, or None if we don't have a fresh one
+
+        Example:
+            answer = cache.get(key)
+            if answer is not None:
+                print("Cache hit!")
+        """
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+
+            saved_at, answer = entry
+
+            # Too old? Forget it and report a miss
+            if time.monotonic() - saved_at > self.ttl_seconds:
+                del self.entries[key]
+                return None
+
+            # Mark as "just used" by moving it to the end
+            self.entries.move_to_end(key)
+            return answer
+
+    def set(self, key, answer):
+        """
+        Saves an answer, forgetting the least recently used one if full.
+
+        Parameters:
+            key (string): The key to save the answer under
+            answer (string): The AI's complete answer
+
+        Returns:
+            None
+
+        Example:
+            cache.set(key, "Use TABLE in a dataview block...")
+        """
+
+        with self.lock:
+            self.entries[key] = (time.monotonic(), answer)
+            self.entries.move_to_end(key)
+
+            # Over the limit? Drop from the front (least recently used)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def __len__(self):
+        """
+        Returns how many answers are stored (so len(cache) works).
+
+        Returns:
+            integer: Number of stored answers (some may have expired)
+        """
+
+        return len(self.entries)
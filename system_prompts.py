@@ -0,0 +1,235 @@
+"""
+===============================================================================
+SYSTEM PROMPTS
+===============================================================================
+Purpose: This file stores the instructions ("system prompts") that tell the
+         AI HOW to answer: quickly in normal mode, or thoroughly in
+         Deep Research Mode.
+
+Why a separate file?
+    - The prompts are long texts, not app logic
+    - Keeping them in one place makes them easy to read and tweak
+    - Every part of the app uses exactly the same text
+
+Why does "exactly the same text" matter?
+    OpenAI remembers the beginning of prompts it has seen recently
+    ("prompt caching"). If a new request starts with the SAME text,
+    OpenAI can skip re-reading that part - the answer starts sooner
+    and those tokens are billed at a discount.
+
+    This only works if the text is byte-for-byte identical, so:
+    - Each prompt is defined once, here, in its final form
+    - We .strip() away the leading/trailing blank lines once
+    - Nothing in these texts changes between requests (no dates, no names)
+    - The knowledge base (identical in both modes) comes FIRST, and the
+      mode-specific instructions after it - so the long shared start
+      stays the same even when the user toggles Deep Research
+    - The conversation (which changes every turn) always comes last
+
+How it works:
+    - app.py imports these constants when building a request
+    - build_system_prompt() glues the knowledge base and a methodology
+      together once per mode and remembers the result
+    - PROMPT_CACHE_KEYS gives each mode a name, which helps OpenAI send
+      requests that share a prompt to the same cache
+===============================================================================
+"""
+
+# lru_cache: Remembers what a function returned for given inputs,
+# so calling it again with the same inputs skips the work
+from functools import lru_cache
+
+# The knowledge base text that goes into every system prompt
+from obsidian_knowledge import get_cached_context
+
+
+# ============================================
+# SECTION 1: DEEP RESEARCH METHODOLOGY
+# ============================================
+"""
+This section defines how "Deep Research Mode" works.
+Like Gemini or Claude's deep research feature, we use
+a special methodology for more thorough analysis.
+"""
+
+# Deep Research System Prompt
+# This tells the AI how to behave in deep research mode
+DEEP_RESEARCH_INSTRUCTIONS = """
+You are operating in DEEP RESEARCH MODE. This means you should:
+
+1. **THINK STEP-BY-STEP**: Break down complex questions into smaller parts
+   - Identify what the user is really asking
+   - Consider multiple aspects of the question
+   - Build your answer methodically
+
+2. **PROVIDE COMPREHENSIVE ANALYSIS**: Don't just give quick answers
+   - Explain the "why" behind your recommendations
+   - Discuss pros and cons of different approaches
+   - Consider edge cases and potential issues
+
+3. **USE MULTIPLE PERSPECTIVES**: Look at questions from different angles
+   - Beginner perspective: Easy to understand explanations
+   - Advanced perspective: Technical details and best practices
+   - Practical perspective: Real-world examples and use cases
+
+4. **BE THOROUGH**: Provide more detail than usual
+   - Include code examples with detailed comments
+   - Explain how things work under the hood
+   - Suggest related topics to explore further
+
+5. **VERIFY ACCURACY**: Be more careful with information
+   - Double-check technical details
+   - Provide context for when advice applies
+   - Mention any limitations or caveats
+
+This mode is for users who want deep understanding, not just quick answers.
+""".strip()
+
+
+# ============================================
+# SECTION 2: NORMAL MODE
+# ============================================
+
+# Normal Mode System Prompt
+# This is for regular, quick responses
+NORMAL_MODE_INSTRUCTIONS = """
+You are an expert Obsidian assistant. Provide clear, concise, and practical answers.
+Focus on being helpful and accurate while keeping responses reasonably brief.
+Include code examples when helpful, but keep explanations focused.
+""".strip()
+
+
+# ============================================
+# SECTION 3: PROMPT CACHE KEYS
+# ============================================
+"""
+OpenAI routes requests with the same "prompt_cache_key" to the same
+cache, which raises the chance that a long shared prompt is reused.
+
+Key = use_deep_research (True/False), Value = cache key name.
+Bump the version suffix (like "-v2") if you edit a prompt, so old cache
+entries are ignored.
+"""
+
+PROMPT_CACHE_KEYS = {
+    True: "obsidian-assistant-deep-v2",
+    False: "obsidian-assistant-normal-v2",
+}
+
+
+# ============================================
+# SECTION 4: FULL SYSTEM PROMPTS
+# ============================================
+"""
+The complete system prompt = Obsidian knowledge base + methodology.
+There is one version for OpenAI (a "system" message) and one for
+Hugging Face (the start of a plain text prompt).
+
+Why is this function here and not in app.py?
+    Streamlit re-runs app.py from top to bottom on every click, which
+    also re-creates every function in it - and with them any @lru_cache
+    memory. This file is only imported once, so its cache survives.
+"""
+
+
+@lru_cache(maxsize=2)
+def build_system_prompt(use_deep_research):
+    """
+    Builds the full OpenAI system prompt (knowledge base + methodology).
+
+    There are only two possible prompts (normal and Deep Research), and
+    neither changes while the app runs. With @lru_cache we build each one
+    the first time it's needed and reuse that exact string afterwards,
+    instead of gluing several kilobytes of text together on every message.
+
+    Parameters:
+        use_deep_research (boolean): True for the Deep Research prompt
+
+    Returns:
+        string: The system prompt
+
+    Example usage:
+        system_prompt = build_system_prompt(False)
+    """
+
+    # Choose methodology based on Deep Research mode
+    if use_deep_research:
+        # DEEP RESEARCH MODE: Use comprehensive analysis methodology
+        methodology_instructions = DEEP_RESEARCH_INSTRUCTIONS
+    else:
+        # NORMAL MODE: Use quick, concise responses
+        methodology_instructions = NORMAL_MODE_INSTRUCTIONS
+
+    # Format: Obsidian Knowledge + Methodology Instructions
+    # The knowledge base goes FIRST: it's the biggest part and it's the
+    # same in both modes, so OpenAI's prompt cache can reuse it even
+    # after the user switches Deep Research on or off (see top of file)
+    return f"""=== OBSIDIAN KNOWLEDGE BASE ===
+{get_cached_context()}
+
+=== HOW TO ANSWER ===
+{methodology_instructions}
+
+Remember: Help users master Obsidian with clear explanations and practical examples."""
+
+
+@lru_cache(maxsize=2)
+def build_system_message(use_deep_research):
+    """
+    Wraps the system prompt in the message format OpenAI expects.
+
+    Like the prompt itself, this little dictionary is the same for every
+    message in a mode, so we build it once and hand out the same object.
+    Callers put it in their messages list but must NOT change it.
+
+    Parameters:
+        use_deep_research (boolean): True for the Deep Research prompt
+
+    Returns:
+        dictionary: {"role": "system", "content": <the system prompt>}
+
+    Example usage:
+        messages = [build_system_message(False), {"role": "user", "content": "Hi"}]
+    """
+
+    return {
+        "role": "system",
+        "content": build_system_prompt(use_deep_research)
+    }
+
+
+@lru_cache(maxsize=2)
+def build_hf_instructions(use_deep_research):
+    """
+    Builds the fixed middle part of every Hugging Face prompt (once per mode).
+
+    Hugging Face models don't have separate "system" messages, so the
+    knowledge, the methodology and the conversation all go into one big
+    text prompt. The knowledge part is chosen per question (see
+    get_relevant_context in obsidian_knowledge.py) to keep each request
+    small; this returns what comes after it, up to the point where the
+    conversation begins.
+
+    Parameters:
+        use_deep_research (boolean): True for the Deep Research version
+
+    Returns:
+        string: Methodology + the "=== CONVERSATION ===" heading
+
+    Example usage:
+        full_prompt = knowledge_text + build_hf_instructions(False) + "User: Hi\nAssistant: "
+    """
+
+    # Choose methodology based on Deep Research mode
+    if use_deep_research:
+        methodology_instructions = DEEP_RESEARCH_INSTRUCTIONS
+    else:
+        methodology_instructions = NORMAL_MODE_INSTRUCTIONS
+
+    # Format: Methodology + start of the conversation
+    return f"""=== HOW TO ANSWER ===
+{methodology_instructions}
+
+=== CONVERSATION ===
+
+"""
@@ -0,0 +1,36 @@
+"""
+===============================================================================
+FAKE CLOCK (TEST HELPER)
+===============================================================================
+Purpose: A stand-in for time.monotonic() that only moves when a test
+         tells it to.
+
+Tests that check waiting and expiry times use this instead of really
+waiting, so they run instantly and always give the same result.
+
+Example usage:
+    clock = FakeClock()
+    with mock.patch("response_cache.time.monotonic", clock):
+        clock.advance(30)  # Pretend 30 seconds passed
+===============================================================================
+"""
+
+
+class FakeClock:
+    """
+    A clock that only moves when the test says so.
+
+    Attributes:
+        now (float): The current fake time, in seconds
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        """Returns the current fake time (so it can replace time.monotonic)."""
+        return self.now
+
+    def advance(self, seconds):
+        """Moves the fake time forward by the given number of seconds."""
+        self.now = self.now + seconds
@@ -0,0 +1,69 @@
+"""
+===============================================================================
+CHAT HISTORY FORMATTING TESTS
+===============================================================================
+Purpose: Checks that older chat messages, shown together as one block of
+         markdown, can't spill into each other.
+
+The most common way that goes wrong is a code block left open (an answer
+cut off half way through its code): everything after it would be shown
+as code too.
+
+How to run (from the project folder):
+    python -m unittest discover tests
+===============================================================================
+"""
+
+# unittest: Python's built-in testing tool (nothing extra to install)
+import unittest
+
+from app import close_open_code_fence, format_history_markdown
+
+
+class TestCloseOpenCodeFence(unittest.TestCase):
+    """Closing code blocks a message left open."""
+
+    def test_closed_block_is_unchanged(self):
+        text = "Try this:\n```dataview\nTABLE file.name\n```\nDone!"
+        self.assertEqual(close_open_code_fence(text), text)
+
+    def test_plain_text_is_unchanged(self):
+        self.assertEqual(close_open_code_fence("Use `inline` code"), "Use `inline` code")
+
+    def test_open_block_gets_closed(self):
+        self.assertEqual(
+            close_open_code_fence("```dataview\nTABLE file.name"),
+            "```dataview\nTABLE file.name\n```",
+        )
+
+    def test_uses_the_same_fence_as_the_opening(self):
+        self.assertEqual(close_open_code_fence("~~~~\ncode"), "~~~~\ncode\n~~~~")
+
+    def test_shorter_or_different_fence_does_not_close(self):
+        # ```` is only closed by 4 or more backticks, and never by ~~~
+        text = "````markdown\n```js\nlet a = 1;\n```\n~~~~"
+        self.assertEqual(close_open_code_fence(text), text + "\n````")
+
+
+class TestFormatHistoryMarkdown(unittest.TestCase):
+    """Joining older messages into one block of markdown."""
+
+    def test_labels_and_separators(self):
+        markdown = format_history_markdown([
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello!"},
+        ])
+        self.assertEqual(markdown.count("\n\n---\n\n"), 1)
+        self.assertTrue(markdown.endswith("Hello!"))
+
+    def test_cut_off_code_block_does_not_swallow_later_messages(self):
+        markdown = format_history_markdown([
+            {"role": "assistant", "content": "```dataview\nTABLE file.name"},
+            {"role": "user", "content": "Thanks"},
+        ])
+        before_separator = markdown.split("\n\n---\n\n")[0]
+        self.assertTrue(before_separator.endswith("TABLE file.name\n```"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+===============================================================================
+KNOWLEDGE BASE TESTS
+===============================================================================
+Purpose: Checks that obsidian_knowledge.py finds and combines examples
+         correctly.
+
+These tests used to live at the bottom of obsidian_knowledge.py (in an
+"if __name__ == '__main__':" block). Keeping them here means the app
+never has to load test code, and the checks run automatically instead of
+printing results for you to read.
+
+How to run (from the project folder):
+    python -m unittest discover tests
+===============================================================================
+"""
+
+# unittest: Python's built-in testing tool (nothing extra to install)
+import unittest
+
+from obsidian_knowledge import (
+    get_all_examples_as_context,
+    get_cached_context,
+    get_dataview_example,
+    get_example,
+    get_relevant_context,
+    search_knowledge_base,
+)
+
+
+# ============================================
+# LOOKING UP EXAMPLES
+# ============================================
+
+class TestGetExample(unittest.TestCase):
+    """Getting one example by its topic name."""
+
+    def test_dataview_example_found(self):
+        # Test 1: Get a specific example
+        example = get_dataview_example("basic_table")
+        self.assertIsNotNone(example)
+        self.assertIn("question", example)
+        self.assertIn("answer", example)
+
+    def test_unknown_topic_returns_none(self):
+        self.assertIsNone(get_dataview_example("no_such_topic"))
+
+    def test_get_example_matches_category_helper(self):
+        self.assertIs(get_example("dataview", "basic_table"), get_dataview_example("basic_table"))
+
+    def test_get_example_unknown_category_returns_none(self):
+        self.assertIsNone(get_example("no_such_category", "basic_table"))
+
+
+# ============================================
+# SEARCHING
+# ============================================
+
+class TestSearchKnowledgeBase(unittest.TestCase):
+    """Finding examples that contain a word or phrase."""
+
+    def test_finds_matches(self):
+        # Test 2: Search functionality
+        results = search_knowledge_base("table")
+        self.assertGreater(len(results), 0)
+        for result in results:
+            self.assertIn(result["type"], ("DataView", "Templater", "General Tip"))
+
+    def test_search_ignores_case(self):
+        self.assertEqual(search_knowledge_base("TABLE"), search_knowledge_base("table"))
+
+    def test_part_of_a_word_matches(self):
+        # "tab" is inside "table", so every "table" result is also a "tab" result
+        tab_questions = {result["question"] for result in search_knowledge_base("tab")}
+        for result in search_knowledge_base("table"):
+            self.assertIn(result["question"], tab_questions)
+
+    def test_search_without_letters_still_works(self):
+        # A code fence has no words to look up, so every example is checked
+        self.assertGreater(len(search_knowledge_base("```")), 0)
+
+    def test_no_match_returns_empty_list(self):
+        self.assertEqual(search_knowledge_base("xyzzy"), [])
+
+
+# ============================================
+# BUILDING CONTEXT FOR THE AI
+# ============================================
+
+class TestContext(unittest.TestCase):
+    """Combining examples into text for the AI."""
+
+    def test_full_context_has_every_section(self):
+        # Test 3: Get all context
+        context = get_all_examples_as_context()
+        self.assertTrue(context.startswith("=== YOUR ROLE ===\n"))
+        for heading in ("DATAVIEW EXAMPLES", "TEMPLATER EXAMPLES",
+                        "GENERAL OBSIDIAN TIPS", "COMMON PROBLEMS & SOLUTIONS"):
+            self.assertIn(f"=== {heading} ===", context)
+
+    def test_cached_context_is_built_once(self):
+        self.assertIs(get_cached_context(), get_cached_context())
+        self.assertEqual(get_cached_context(), get_all_examples_as_context())
+
+    def test_relevant_context_is_shorter(self):
+        context = get_relevant_context("How do I make a dataview table?")
+        self.assertIn("=== RELEVANT EXAMPLES ===", context)
+        self.assertLess(len(context), len(get_cached_context()))
+
+    def test_relevant_context_falls_back_to_everything(self):
+        self.assertEqual(get_relevant_context("xyzzy"), get_cached_context())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,158 @@
+"""
+===============================================================================
+PROJECT MANAGER TESTS
+===============================================================================
+Purpose: Checks that projects and their conversations are created, stored,
+         switched and deleted correctly.
+
+These tests used to live at the bottom of project_manager.py (in an
+"if __name__ == '__main__':" block). Keeping them here means the app
+never has to load test code, and the checks run automatically instead of
+printing results for you to read.
+
+How to run (from the project folder):
+    python -m unittest discover tests
+===============================================================================
+"""
+
+# unittest: Python's built-in testing tool (nothing extra to install)
+import unittest
+
+from project_manager import ConversationProject, ProjectManager
+
+
+# ============================================
+# A SINGLE PROJECT
+# ============================================
+
+class TestConversationProject(unittest.TestCase):
+    """Adding, reading and clearing messages in one project."""
+
+    def setUp(self):
+        # setUp runs before every test, so each test gets a fresh project
+        self.project = ConversationProject("Test Project")
+
+    def test_add_messages(self):
+        self.project.add_message("user", "Test question")
+        self.project.add_message("assistant", "Test answer")
+        self.assertEqual(self.project.message_count, 2)
+        self.assertEqual(self.project.get_messages(), [
+            {"role": "user", "content": "Test question"},
+            {"role": "assistant", "content": "Test answer"},
+        ])
+
+    def test_add_messages_bulk(self):
+        self.project.add_messages_bulk([("user", "Q"), ("assistant", "A")])
+        self.project.add_messages_bulk([])
+        self.assertEqual(self.project.message_count, 2)
+        self.assertEqual(self.project.get_last_message(), {"role": "assistant", "content": "A"})
+
+    def test_add_messages_bulk_from_iterators(self):
+        # Generators and iterators work too - even empty ones
+        self.project.add_messages_bulk(iter([]))
+        self.project.add_messages_bulk((role, "Hi") for role in ("user", "assistant"))
+        self.assertEqual(self.project.message_count, 2)
+        self.assertEqual(self.project.get_messages()[0], {"role": "user", "content": "Hi"})
+
+    def test_returned_messages_are_copies(self):
+        self.project.add_message("user", "Original")
+        self.project.get_messages()[0]["content"] = "Changed"
+        self.assertEqual(self.project.get_messages()[0]["content"], "Original")
+
+    def test_messages_page(self):
+        for number in range(5):
+            self.project.add_message("user", str(number))
+
+        page, cursor = self.project.get_messages_page(limit=2)
+        self.assertEqual([message["content"] for message in page], ["3", "4"])
+        self.assertEqual(cursor, 3)
+
+        page, cursor = self.project.get_messages_page(before=cursor, limit=10)
+        self.assertEqual([message["content"] for message in page], ["0", "1", "2"])
+        self.assertIsNone(cursor)
+
+    def test_clear_messages(self):
+        self.project.add_message("user", "Hello")
+        self.project.clear_messages()
+        self.assertEqual(self.project.message_count, 0)
+        self.assertIsNone(self.project.get_last_message())
+
+    def test_summary(self):
+        self.project.toggle_research_mode()
+        summary = self.project.get_summary()
+        self.assertEqual(summary["name"], "Test Project")
+        self.assertEqual(summary["message_count"], 0)
+        self.assertTrue(summary["deep_research_mode"])
+        # Looks like "2025-10-29 14:30:45"
+        self.assertRegex(summary["created_date"], r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+
+
+# ============================================
+# THE PROJECT MANAGER
+# ============================================
+
+class TestProjectManager(unittest.TestCase):
+    """Creating, switching and deleting projects."""
+
+    def setUp(self):
+        self.manager = ProjectManager()
+
+    def test_create_project(self):
+        # Test 1: Create manager and project
+        self.assertTrue(self.manager.create_project("Test Project"))
+        self.assertFalse(self.manager.create_project("Test Project"))
+        # The first project becomes the current one
+        self.assertEqual(self.manager.get_current_project().name, "Test Project")
+
+    def test_create_multiple_projects(self):
+        # Test 3: Create multiple projects
+        for name in ("Test Project", "DataView Help", "Templater Learning"):
+            self.manager.create_project(name)
+        self.assertEqual(
+            self.manager.get_all_project_names(),
+            ("Test Project", "DataView Help", "Templater Learning"),
+        )
+        self.assertEqual(list(self.manager.iter_project_names()), list(self.manager.get_all_project_names()))
+        self.assertEqual(self.manager.project_count, 3)
+        self.assertEqual(self.manager.get_project_count(), 3)
+
+    def test_create_projects_batch(self):
+        self.manager.create_project("Existing")
+        results = self.manager.create_projects(["DataView", "Existing", "DataView", "Templater"])
+        self.assertEqual(results, [True, False, False, True])
+        self.assertEqual(self.manager.get_all_project_names(), ("Existing", "DataView", "Templater"))
+        self.assertEqual(self.manager.get_current_project().name, "Existing")
+
+    def test_switch_project(self):
+        # Test 4: Switch projects
+        self.manager.create_projects(["Test Project", "DataView Help"])
+        self.assertTrue(self.manager.switch_to_project("DataView Help"))
+        self.assertEqual(self.manager.get_current_project().name, "DataView Help")
+        self.assertFalse(self.manager.switch_to_project("Missing"))
+
+    def test_delete_current_project_switches_to_first(self):
+        self.manager.create_projects(["First", "Second", "Third"])
+        self.manager.switch_to_project("Third")
+        self.assertTrue(self.manager.delete_project("Third"))
+        self.assertEqual(self.manager.get_current_project().name, "First")
+        self.assertFalse(self.manager.delete_project("Third"))
+
+    def test_delete_last_project(self):
+        self.manager.create_project("Only")
+        self.manager.delete_project("Only")
+        self.assertIsNone(self.manager.get_current_project())
+        self.assertEqual(self.manager.get_all_project_names(), ())
+
+    def test_projects_summary(self):
+        # Test 5: Get summaries
+        self.manager.create_projects(["Test Project", "DataView Help"])
+        self.manager.get_current_project().add_message("user", "Test question")
+        summaries = self.manager.get_all_projects_summary()
+        self.assertEqual(
+            [(summary["name"], summary["message_count"]) for summary in summaries],
+            [("Test Project", 1), ("DataView Help", 0)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+===============================================================================
+RATE LIMITER TESTS
+===============================================================================
+Purpose: Checks that the token bucket in rate_limiter.py allows short
+         bursts, refills at the right speed, and tells callers exactly
+         how long to wait.
+
+We never really wait in these tests. Instead we replace the clock
+(time.monotonic) with a fake one we can move forward by hand, and
+replace asyncio.sleep with a fake that only records how long it
+was asked to sleep.
+
+How to run (from the project folder):
+    python -m unittest discover tests
+===============================================================================
+"""
+
+# asyncio: To run the async take_async() from a normal test
+import asyncio
+
+# unittest: Python's built-in testing tool (nothing extra to install)
+import unittest
+
+# mock.patch: Swaps a function for a fake one during a single test
+from unittest import mock
+
+from rate_limiter import TokenBucket
+
+# Shared test helper (tests/fake_clock.py)
+from fake_clock import FakeClock
+
+
+class TestTokenBucket(unittest.TestCase):
+    """Bursts, refilling and wait times."""
+
+    def setUp(self):
+        # Every test gets its own fake clock, installed before the bucket
+        # is created so last_refill starts at the fake time
+        self.clock = FakeClock()
+        patcher = mock.patch("rate_limiter.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_up_to_capacity_goes_right_away(self):
+        bucket = TokenBucket(rate=5)
+        for _ in range(5):
+            self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_empty_bucket_returns_wait_time(self):
+        bucket = TokenBucket(rate=5)
+        for _ in range(5):
+            bucket.reserve()
+
+        # One token drips in every 1/5 second
+        self.assertAlmostEqual(bucket.reserve(), 0.2)
+        # The next caller lines up behind the first one
+        self.assertAlmostEqual(bucket.reserve(), 0.4)
+
+    def test_tokens_refill_over_time(self):
+        bucket = TokenBucket(rate=2, capacity=2)
+        bucket.reserve()
+        bucket.reserve()
+
+        # Half a second at 2 tokens/second = one new token
+        self.clock.advance(0.5)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+
+    def test_refill_never_exceeds_capacity(self):
+        bucket = TokenBucket(rate=2, capacity=3)
+
+        # A long quiet time still only fills the bucket to capacity
+        self.clock.advance(60)
+        for _ in range(3):
+            self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.5)
+
+    def test_capacity_defaults_to_rate(self):
+        self.assertEqual(TokenBucket(rate=3).capacity, 3)
+
+    def test_take_async_sleeps_without_blocking(self):
+        bucket = TokenBucket(rate=4, capacity=1)
+        with mock.patch("rate_limiter.asyncio.sleep", new=mock.AsyncMock()) as fake_sleep:
+            asyncio.run(bucket.take_async())
+            fake_sleep.assert_not_called()
+
+            asyncio.run(bucket.take_async())
+            fake_sleep.assert_awaited_once()
+            self.assertAlmostEqual(fake_sleep.await_args[0][0], 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+"""
+===============================================================================
+RESPONSE CACHE TESTS
+===============================================================================
+Purpose: Checks that remembered answers are found again, forgotten in the
+         right order when the cache is full, and expire on time.
+
+Every answer the app gives goes through this cache, so a mistake here
+would mean wrong (or stale) answers for everyone.
+
+We never really wait in these tests. Instead we replace the clock
+(time.monotonic) with a fake one we can move forward by hand.
+
+How to run (from the project folder):
+    python -m unittest discover tests
+===============================================================================
+"""
+
+# unittest: Python's built-in testing tool (nothing extra to install)
+import unittest
+
+# mock.patch: Swaps a function for a fake one during a single test
+from unittest import mock
+
+from response_cache import ResponseCache
+
+# make_response_cache_key lives in app.py (it needs the app's settings)
+from app import make_response_cache_key
+
+# Shared test helper (tests/fake_clock.py)
+from fake_clock import FakeClock
+
+
+# ============================================
+# THE CACHE ITSELF
+# ============================================
+
+class TestResponseCache(unittest.TestCase):
+    """Saving, finding, evicting and expiring answers."""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = mock.patch("response_cache.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_set_and_get(self):
+        cache = ResponseCache(max_entries=10, ttl_seconds=60)
+        cache.set("a", "Answer A")
+        self.assertEqual(cache.get("a"), "Answer A")
+
+    def test_missing_key_returns_none(self):
+        cache = ResponseCache(max_entries=10, ttl_seconds=60)
+        self.assertIsNone(cache.get("missing"))
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", "Answer A")
+        cache.set("b", "Answer B")
+
+        # Reading "a" makes it the most recently used, so "b" goes first
+        cache.get("a")
+        cache.set("c", "Answer C")
+
+        self.assertEqual(cache.get("a"), "Answer A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), "Answer C")
+
+    def test_setting_again_refreshes_position(self):
+        cache = ResponseCache(max_entries=2, ttl_seconds=60)
+        cache.set("a", "Old A")
+        cache.set("b", "Answer B")
+        cache.set("a", "New A")
+        cache.set("c", "Answer C")
+
+        self.assertEqual(cache.get("a"), "New A")
+        self.assertIsNone(cache.get("b"))
+
+    def test_answers_expire(self):
+        cache = ResponseCache(max_entries=10, ttl_seconds=30)
+        cache.set("a", "Answer A")
+
+        self.clock.advance(30)
+        self.assertEqual(cache.get("a"), "Answer A")
+
+        self.clock.advance(1)
+        self.assertIsNone(cache.get("a"))
+        # The expired answer is removed, not just hidden
+        self.assertEqual(len(cache), 0)
+
+    def test_len_counts_stored_answers(self):
+        cache = ResponseCache(max_entries=2, ttl_seconds=60)
+        self.assertEqual(len(cache), 0)
+        cache.set("a", "Answer A")
+        cache.set("b", "Answer B")
+        cache.set("c", "Answer C")
+        self.assertEqual(len(cache), 2)
+
+
+# ============================================
+# THE CACHE KEY
+# ============================================
+
+class TestResponseCacheKey(unittest.TestCase):
+    """The same question in the same conversation gets the same key."""
+
+    def test_key_is_stable(self):
+        history = [{"role": "user", "content": "Hi"}, {"role": "assistant", "content": "Hello!"}]
+        first = make_response_cache_key("openai", "gpt-4o-mini", "What is DataView?", history)
+        second = make_response_cache_key("openai", "gpt-4o-mini", "What is DataView?", list(history))
+        self.assertEqual(first, second)
+        self.assertEqual(len(first), 64)
+
+    def test_key_ignores_case_and_whitespace(self):
+        self.assertEqual(
+            make_response_cache_key("openai", "gpt-4o-mini", "What is DataView?", []),
+            make_response_cache_key("openai", "gpt-4o-mini", "  what is   DATAVIEW?\n", []),
+        )
+
+    def test_key_keeps_punctuation(self):
+        # In Obsidian, symbols change the meaning of a question
+        pairs = [
+            ("How do I use C++?", "How do I use C#?"),
+            ("What does [[link]] do?", "What does #link do?"),
+            ("What is ![[embed]]?", "What is [[embed]]?"),
+            ("What is key:: value?", "What is key: value?"),
+        ]
+        for first, second in pairs:
+            self.assertNotEqual(
+                make_response_cache_key("openai", "gpt-4o-mini", first, []),
+                make_response_cache_key("openai", "gpt-4o-mini", second, []),
+                msg=f"{first!r} and {second!r} must not share a key",
+            )
+
+    def test_key_keeps_non_ascii_questions_apart(self):
+        self.assertNotEqual(
+            make_response_cache_key("openai", "gpt-4o-mini", "什么是双链?", []),
+            make_response_cache_key("openai", "gpt-4o-mini", "如何创建表格?", []),
+        )
+
+    def test_key_changes_with_context(self):
+        base = make_response_cache_key("openai", "gpt-4o-mini", "And for tasks?", [])
+        self.assertNotEqual(base, make_response_cache_key("huggingface", "gpt-4o-mini", "And for tasks?", []))
+        self.assertNotEqual(base, make_response_cache_key("openai", "gpt-4", "And for tasks?", []))
+        self.assertNotEqual(
+            base,
+            make_response_cache_key("openai", "gpt-4o-mini", "And for tasks?", [{"role": "user", "content": "Tables?"}]),
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
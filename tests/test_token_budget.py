@@ -0,0 +1,154 @@
+"""
+===============================================================================
+TOKEN BUDGET TESTS
+===============================================================================
+Purpose: Checks that app.py sends only as much conversation history as the
+         model can take, and always leaves room for a real answer.
+
+Every model has a context window (a limit on prompt + answer). If we get
+this wrong, OpenAI either rejects the request or the answer is cut off
+after a word or two - gpt-4 with Deep Research on is the tightest case.
+
+We count tokens with the app's own estimate_token_count(), so these tests
+work with or without tiktoken installed.
+
+How to run (from the project folder):
+    python -m unittest discover tests
+===============================================================================
+"""
+
+# unittest: Python's built-in testing tool (nothing extra to install)
+import unittest
+
+from app import (
+    DEEP_RESEARCH_PERSPECTIVE_MAX_TOKENS,
+    DEEP_RESEARCH_STEPS,
+    MAX_CONTEXT_TOKENS,
+    MIN_ANSWER_TOKENS,
+    build_system_message,
+    estimate_token_count,
+    fit_max_tokens,
+    get_history_token_budget,
+    trim_history_to_token_budget,
+)
+
+
+def make_history(count, words_per_message=200):
+    """Builds a long back-and-forth conversation for the tests."""
+    return [
+        {
+            "role": "user" if number % 2 == 0 else "assistant",
+            "content": f"Message {number}: " + "dataview table " * words_per_message,
+        }
+        for number in range(count)
+    ]
+
+
+# ============================================
+# TRIMMING THE HISTORY
+# ============================================
+
+class TestTrimHistory(unittest.TestCase):
+    """Keeping the newest messages that fit the budget."""
+
+    def test_everything_fits(self):
+        history = make_history(4, words_per_message=5)
+        self.assertEqual(trim_history_to_token_budget(history, max_tokens=10_000), history)
+
+    def test_keeps_newest_messages_in_order(self):
+        history = make_history(10)
+        one_message = estimate_token_count(history[-1]["content"])
+
+        trimmed = trim_history_to_token_budget(history, max_tokens=one_message * 3)
+
+        self.assertEqual(trimmed, history[-len(trimmed):])
+        self.assertGreater(len(trimmed), 0)
+        self.assertLess(len(trimmed), len(history))
+
+    def test_stops_at_first_message_that_does_not_fit(self):
+        # A short old message must not be picked up after skipping a long one,
+        # or the conversation would have a gap in it
+        history = [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "table " * 2000},
+            {"role": "user", "content": "Thanks"},
+        ]
+        self.assertEqual(trim_history_to_token_budget(history, max_tokens=50), history[-1:])
+
+    def test_zero_budget_sends_no_history(self):
+        self.assertEqual(trim_history_to_token_budget(make_history(4), max_tokens=0), [])
+
+    def test_empty_history(self):
+        self.assertEqual(trim_history_to_token_budget([]), [])
+
+
+# ============================================
+# FITTING THE ANSWER
+# ============================================
+
+class TestFitMaxTokens(unittest.TestCase):
+    """Shrinking max_tokens so prompt + answer fit the context window."""
+
+    def test_short_prompt_keeps_requested_size(self):
+        messages = [build_system_message(False), {"role": "user", "content": "What is DataView?"}]
+        self.assertEqual(fit_max_tokens("gpt-4o-mini", messages, False, 1000), 1000)
+
+    def test_answer_shrinks_to_fit(self):
+        messages = [build_system_message(False), {"role": "user", "content": "What is DataView?"}]
+        max_tokens = fit_max_tokens("gpt-4", messages, False, 8000)
+        self.assertGreaterEqual(max_tokens, MIN_ANSWER_TOKENS)
+        self.assertLess(max_tokens, 8000)
+
+    def test_too_long_prompt_returns_none(self):
+        # Asking for 1 token of answer would be useless - report it instead
+        messages = [build_system_message(False), {"role": "user", "content": "table " * 40_000}]
+        self.assertIsNone(fit_max_tokens("gpt-4", messages, False, 1000))
+
+    def test_unknown_model_uses_default_window(self):
+        messages = [build_system_message(False), {"role": "user", "content": "table " * 40_000}]
+        self.assertIsNone(fit_max_tokens("some-new-model", messages, False, 1000))
+
+
+# ============================================
+# HISTORY BUDGET PER MODEL
+# ============================================
+
+class TestHistoryTokenBudget(unittest.TestCase):
+    """Smaller context windows get less history."""
+
+    def test_large_window_uses_usual_limit(self):
+        self.assertEqual(get_history_token_budget("gpt-4o-mini", "Hi", True), MAX_CONTEXT_TOKENS)
+
+    def test_small_window_gets_less_history(self):
+        self.assertLess(get_history_token_budget("gpt-4", "Hi", True), MAX_CONTEXT_TOKENS)
+
+    def test_huge_question_leaves_no_history(self):
+        self.assertEqual(get_history_token_budget("gpt-4", "table " * 40_000, False), 0)
+
+    def test_gpt4_deep_research_still_has_room_for_an_answer(self):
+        # The case that used to end with max_tokens=1: gpt-4, Deep Research
+        # on, and a long conversation
+        question = "How do I build a reading tracker with DataView?"
+        budget = get_history_token_budget("gpt-4", question, True)
+        history = trim_history_to_token_budget(make_history(40), budget)
+
+        # Longest possible notes from every Deep Research step
+        # (as many words as fit in DEEP_RESEARCH_PERSPECTIVE_MAX_TOKENS)
+        sample = "table " * DEEP_RESEARCH_PERSPECTIVE_MAX_TOKENS
+        words = DEEP_RESEARCH_PERSPECTIVE_MAX_TOKENS ** 2 // estimate_token_count(sample)
+        notes = "\n\n".join(
+            f"### {step} perspective\n" + "table " * words
+            for step in DEEP_RESEARCH_STEPS
+        )
+
+        messages = [
+            build_system_message(True),
+            *history,
+            {"role": "user", "content": question},
+            {"role": "system", "content": notes},
+        ]
+        self.assertGreaterEqual(fit_max_tokens("gpt-4", messages, True, 2500), MIN_ANSWER_TOKENS)
+
+
+if __name__ == "__main__":
+    unittest.main()